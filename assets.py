@@ -0,0 +1,221 @@
+# assets.py
+# loads the pictures the game needs, already scaled to the size they are drawn at and converted to
+# the display's pixel format so blits do not have to convert pixels every frame.
+# if build_assets.py has been run the pictures come out of one pre-scaled atlas page per level
+# (plus the menus), otherwise straight from the original PNGs.
+# only the main menu is loaded up front. everything else is read from disk on a background thread
+# ahead of time (the next level while the current one is played) and converted when it is needed.
+# which pictures a level has, and the size each is drawn at, comes from levels.json.
+# with a memory budget the loader only keeps that many bytes of converted pictures. the main menu
+# and the page the current scene is drawn from are pinned, and everything else is thrown away least
+# recently used first when the budget is exceeded - a level that comes round again is just read
+# from disk again. pictures made from a page elsewhere - the flattened scene backgrounds of the dirty
+# renderer and the rotated guns - are counted with their page and thrown away with it.
+# report() says how many bytes each resident picture takes
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+
+BUILD_DIR = 'assets/build'
+
+
+#name -> (original file, size it is drawn at or None, opaque) for everything a level needs
+def level_sprites(level):
+    n = level.number
+    sprites = {f'bgs/{n}': (level.background, None, True),
+               f'banners/{n}': (level.banner, None, True),
+               f'guns/{n}': (level.gun, (100, 100), False)}
+    for j, tier in enumerate(level.tiers, 1):
+        sprites[f'targets/{n}/{j}'] = (tier.image, tier.size, False)
+    return sprites
+
+
+#what the main menu needs for its first frame
+def menu_sprites():
+    return {'menus/mainMenu': ('assets/menus/mainMenu.png', None, True),
+            'powerups/score_multiplier': ('assets/powerups/score_multiplier.png', (50, 50), False)}
+
+
+#the other full-screen menus, loaded in the background once the main menu is up
+def common_sprites():
+    return {'menus/gameOver': ('assets/menus/gameOver.png', None, True),
+            'menus/pause': ('assets/menus/pause.png', None, True)}
+
+
+#the pixel memory a converted picture holds
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+class LevelAssets:
+    def __init__(self, level, sprites):
+        n = level.number
+        self.bg = sprites[f'bgs/{n}']
+        self.banner = sprites[f'banners/{n}']
+        self.gun = sprites[f'guns/{n}']
+        self.targets = [sprites[f'targets/{n}/{j}'] for j in range(1, len(level.tiers) + 1)]
+        #what a shot is tested against - the visible pixels of each target picture at the size it is drawn
+        self.masks = [pygame.mask.from_surface(image) for image in self.targets]
+
+
+class AssetLoader:
+    #budget is the bytes of converted pictures to keep, None for no limit
+    def __init__(self, levels, build_dir=BUILD_DIR, budget=None):
+        self.levels = levels                                          #level number -> Level from levels.json
+        self.build_dir = build_dir
+        self.budget = budget
+        self.manifest = None
+        manifest_path = os.path.join(build_dir, 'manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as file:
+                self.manifest = json.load(file)
+        self.pages = OrderedDict()                                    #page -> {name: picture}, converted and ready to draw, least recently used first
+        self.page_bytes = {}                                          #page -> bytes its converted pictures take
+        self.pinned = {'menu'}                                        #the pages the current scene draws from, never thrown away
+        self.evictions = 0
+        self.derived = None                                           #page -> {name: picture made from it}, see watch()
+        self.forget_derived = None
+        self.pending = {}                                             #page -> future of the unconverted pictures
+        self.level_assets = {}                                        #level number -> LevelAssets
+        self.prefetcher = ThreadPoolExecutor(max_workers=1)
+        self.menu = self.page('menu')
+
+    def page_sprites(self, page):
+        if page == 'menu':
+            return menu_sprites()
+        if page == 'common':
+            return common_sprites()
+        return level_sprites(self.levels[int(page[len('level'):])])
+
+    #an atlas built before levels.json last changed is only used for the pages it still matches
+    def in_atlas(self, page, sprites):
+        if not self.manifest or page not in self.manifest['pages']:
+            return False
+        for name, (path, size, opaque) in sprites.items():
+            built = self.manifest['sprites'].get(name)
+            if built is None or built.get('source') != path or (size is not None and tuple(built['rect'][2:]) != size):
+                return False
+        return True
+
+    #reading and decoding the files - safe to do off the main thread
+    def read(self, page):
+        sprites = self.page_sprites(page)
+        if self.in_atlas(page, sprites):
+            sheet = pygame.image.load(os.path.join(self.build_dir, self.manifest['pages'][page]))
+            return {name: sheet.subsurface(self.manifest['sprites'][name]['rect']) for name in sprites}
+        raw = {}
+        for name, (path, size, opaque) in sprites.items():
+            image = pygame.image.load(path)
+            if size is not None:
+                image = pygame.transform.scale(image, size)
+            raw[name] = image
+        return raw
+
+    #converting needs the display, so this always happens on the main thread
+    def convert(self, page, raw):
+        sprites = self.page_sprites(page)
+        converted = {}
+        for name, image in raw.items():
+            if sprites[name][2]:
+                converted[name] = image.convert()
+            else:
+                converted[name] = image.convert_alpha()
+        return converted
+
+    #start reading a page from disk in the background
+    def prefetch(self, page):
+        if page not in self.pages and page not in self.pending:
+            self.pending[page] = self.prefetcher.submit(self.read, page)
+
+    #everything the level needs - its pictures and where its targets start
+    def prefetch_level(self, level):
+        if level in self.levels:
+            self.prefetch(f'level{level}')
+            if self.levels[level].layout is None:
+                self.prefetcher.submit(self.levels[level].spawn_layout)
+
+    def page(self, page):
+        pictures = self.pages.get(page)
+        if pictures is None:
+            future = self.pending.pop(page, None)
+            raw = future.result() if future is not None else self.read(page)
+            pictures = self.convert(page, raw)
+            self.pages[page] = pictures
+            self.page_bytes[page] = sum(surface_bytes(picture) for picture in pictures.values())
+            self.evict(keep=page)                                     #the caller is about to use it, even if it is not pinned yet
+        else:
+            self.pages.move_to_end(page)
+        return pictures
+
+    #the pages the scene being drawn now needs - they stay pinned, with the menu, until the scene changes
+    def use(self, *pages):
+        pinned = {'menu', *pages}
+        if pinned != self.pinned:
+            self.pinned = pinned
+            for page in pages:
+                self.page(page)
+            self.evict()
+
+    #derived(page) gives the pictures something else made from the page, forget(page) throws them away.
+    #one engine uses a loader at a time, so the last one to call this is the one that counts
+    def watch(self, derived, forget):
+        self.derived = derived
+        self.forget_derived = forget
+
+    def derived_bytes(self, page):
+        if self.derived is None:
+            return 0
+        return sum(surface_bytes(picture) for picture in self.derived(page).values())
+
+    #throw away the least recently used pages that are not pinned until everything fits the budget
+    def evict(self, keep=None):
+        if self.budget is None:
+            return
+        total = self.resident_bytes()
+        for page in list(self.pages):
+            if total <= self.budget:
+                break
+            if page in self.pinned or page == keep:
+                continue
+            total -= self.page_bytes.pop(page) + self.derived_bytes(page)
+            del self.pages[page]
+            if page.startswith('level'):
+                self.level_assets.pop(int(page[len('level'):]), None)
+            if self.forget_derived is not None:
+                self.forget_derived(page)
+            self.evictions += 1
+
+    def resident_bytes(self):
+        return sum(self.page_bytes[page] + self.derived_bytes(page) for page in self.pages)
+
+    #name -> (page, bytes, pinned) for every picture that is loaded now, and every picture made from one
+    def report(self):
+        report = {}
+        for page, pictures in self.pages.items():
+            if self.derived is not None:
+                pictures = {**pictures, **self.derived(page)}
+            for name, picture in pictures.items():
+                report[name] = (page, surface_bytes(picture), page in self.pinned)
+        return report
+
+    def common(self, name):
+        return self.page('common')[name]
+
+    def level(self, level):
+        page = f'level{level}'
+        assets = self.level_assets.get(level)
+        if assets is None or page not in self.pages:
+            assets = LevelAssets(self.levels[level], self.page(page))
+            self.level_assets[level] = assets
+        else:
+            self.pages.move_to_end(page)
+        return assets
+
+    #waits for everything started in the background so far - the benchmark keeps it out of what it measures
+    def settle(self):
+        self.prefetcher.submit(lambda: None).result()                 #one worker, so this runs after all of it
+
+    def shutdown(self):
+        self.prefetcher.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,154 @@
+# audio.py
+# decoding the sound effects (two of them are MP3s) used to hold up the first frame. the sounds are
+# now decoded on a background thread while the menu is already up - until they are ready a hit just
+# makes no sound, and the music starts as soon as it has loaded.
+# a decoded effect is also written to assets/build/sounds as raw PCM in the mixer's format, so every
+# start after the first just reads the samples back instead of decoding the MP3 again.
+# effects play on a few reserved channels that the bank hands out itself instead of whatever channel
+# pygame picks: a sound played again within its minimum gap is dropped, a sound that already has all
+# its voices going restarts its oldest one, and when every channel is busy the sound that has been
+# playing longest is cut off. however many targets are hit a second, the mixer never has more than
+# EFFECT_CHANNELS effects to mix
+from concurrent.futures import ThreadPoolExecutor
+import os
+import struct
+import pygame
+from assets import BUILD_DIR
+
+#name -> (file, volume, minimum seconds between two plays, most voices playing at once)
+sound_files = {'plate': ('assets/sounds/Splash water.mp3', 1.0, .06, 3),   #was 2.5, but pygame clamps volumes to 1
+               'bird': ('assets/sounds/Drill Gear.mp3', .2, .06, 3),
+               'laser': ('assets/sounds/Laser Gun.wav', .3, .04, 4)}
+music_file = 'assets/sounds/bg_music.mp3'
+
+EFFECT_CHANNELS = 8
+CACHE_DIR = os.path.join(BUILD_DIR, 'sounds')
+#'LBSN' magic, u16 version, mixer frequency, sample format, channels, source file size and mtime
+CACHE_HEADER = struct.Struct('<4sHiiiqd')
+CACHE_MAGIC = b'LBSN'
+CACHE_VERSION = 1
+
+
+def cache_path(name):
+    return os.path.join(CACHE_DIR, name + '.pcm')
+
+
+#the samples of `path` decoded to the mixer's format - from the cache if it was made from this very
+#file with the same mixer settings, otherwise decoded and cached for next time
+def decode(name, path):
+    stat = os.stat(path)
+    header = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, *pygame.mixer.get_init(), stat.st_size, stat.st_mtime)
+    try:
+        with open(cache_path(name), 'rb') as file:
+            if file.read(CACHE_HEADER.size) == header:
+                return pygame.mixer.Sound(buffer=file.read())
+    except OSError:
+        pass
+    sound = pygame.mixer.Sound(path)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temp = cache_path(name) + '.tmp'
+        with open(temp, 'wb') as file:
+            file.write(header)
+            file.write(sound.get_raw())
+        os.replace(temp, cache_path(name))                             #a half written cache file is never picked up
+    except OSError:                                                   #a read-only install still plays, it just decodes every time
+        pass
+    return sound
+
+
+class SoundBank:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.sounds = {}
+        self.music_loaded = False
+        self.music_wanted = False                                     #play_music was asked for before the music was ready
+        self.future = None
+        self.channels = []
+        self.voices = []                                              #per channel, (sound name, started at) of what it last played
+        self.last_played = {}                                         #sound name -> when it was last played, in ms
+        self.plays = self.dropped = self.stolen = 0
+        if enabled:
+            pygame.mixer.init()
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), EFFECT_CHANNELS))
+            pygame.mixer.set_reserved(EFFECT_CHANNELS)                #pygame's own Sound.play never takes these
+            self.channels = [pygame.mixer.Channel(i) for i in range(EFFECT_CHANNELS)]
+            self.voices = [(None, 0)] * EFFECT_CHANNELS
+            self.loader = ThreadPoolExecutor(max_workers=1)
+            self.future = self.loader.submit(self.load)
+
+    #runs on the loader thread
+    def load(self):
+        sounds = {}
+        for name, (path, volume, _, _) in sound_files.items():
+            sound = decode(name, path)
+            sound.set_volume(volume)
+            sounds[name] = sound
+        try:
+            pygame.mixer.music.load(music_file)
+            music_loaded = True
+        except pygame.error:                                         #the music track is optional, the game still runs without it
+            music_loaded = False
+        return sounds, music_loaded
+
+    #called once a frame on the main thread, picks the sounds up when the loader is done
+    def poll(self):
+        if self.future is not None and self.future.done():
+            self.sounds, self.music_loaded = self.future.result()
+            self.future = None
+            self.loader.shutdown(wait=False)
+            if self.music_wanted:
+                self.play_music()
+
+    #block until everything is decoded - for tools that need the sounds straight away
+    def wait(self):
+        if self.future is not None:
+            self.future.result()
+            self.poll()
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+        now = pygame.time.get_ticks()
+        _, _, gap, max_voices = sound_files[name]
+        last = self.last_played.get(name)
+        if last is not None and now - last < gap * 1000:
+            self.dropped += 1
+            return
+        self.last_played[name] = now
+        self.plays += 1
+        self.channels[self.pick_channel(name, max_voices)].play(sound)
+
+    #a free channel if the sound may have another voice, otherwise the longest playing voice is stolen -
+    #its own oldest one if it already has all of them going, any sound's oldest if every channel is busy
+    def pick_channel(self, name, max_voices):
+        own = []
+        free = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                if free is None:
+                    free = i
+            elif self.voices[i][0] == name:
+                own.append(i)
+        if len(own) >= max_voices:
+            pick = min(own, key=lambda i: self.voices[i][1])
+        elif free is not None:
+            pick = free
+        else:
+            pick = min(range(len(self.channels)), key=lambda i: self.voices[i][1])
+        if pick != free:
+            self.stolen += 1
+        self.voices[pick] = (name, pygame.time.get_ticks())
+        return pick
+
+    def play_music(self):
+        if self.music_loaded:
+            pygame.mixer.music.play()
+            self.music_wanted = False
+        elif self.future is not None:
+            self.music_wanted = True
+
+    def stats(self):
+        return {'plays': self.plays, 'dropped': self.dropped, 'stolen': self.stolen,
+                'busy_channels': sum(1 for channel in self.channels if channel.get_busy())}
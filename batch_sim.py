@@ -0,0 +1,239 @@
+# batch_sim.py
+# plays thousands of games headless with an aimbot instead of a person, to tune the balance knobs -
+# how many targets each level has, how much faster each tier moves (speed_base ** tier, instead of the
+# speeds in levels.json), the ammo in accuracy mode and the time limit in timed mode. every combination of the values given is a cell
+# of the grid, every cell is played --games times per mode, and the score, accuracy and completion
+# time of each cell are written to a JSON results file.
+# games are handed out to a process pool and share nothing, so it scales with the number of cores.
+#
+#   python batch_sim.py --games 200 --out results.json
+#   python batch_sim.py --speed-base 1.5 2 2.5 --ammo 60 81 100 --time-limit 20 30 45 --modes 1 2
+#   python batch_sim.py --counts 10,5,3/12,8,5/15,12,8,3 8,4,2/10,6,4/12,10,6,2 --csv games.csv
+#   python batch_sim.py --aim-error 0 10 20 --reaction 4 8 12     (sweep the player's skill instead)
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+import pygame
+from engine import GameEngine, FrameInput, WIDTH, HEIGHT
+from assets import AssetLoader
+from levels import load_levels
+from profiler import percentile
+
+MODES = {0: 'freeplay', 1: 'accuracy', 2: 'timed'}
+
+#per worker process, set up once by init_worker
+worker = {}
+
+
+#aims at a live target on screen every `reaction` frames and fires with a gaussian aim error of
+#aim_error pixels. power-ups are shot as soon as they show up. a shot is tested against where the
+#targets were drawn on the last frame, so that is where the bot aims, like a player would
+class AimBot:
+    def __init__(self, rng, aim_error=12.0, reaction=12):
+        self.rng = rng
+        self.aim_error = aim_error
+        self.reaction = reaction
+        self.frame = 0
+        self.mouse_pos = (WIDTH // 2, 300)
+        self.released = True
+
+    def pick_target(self, engine):
+        for powerup in engine.powerups.pool:
+            if powerup.visible:
+                return powerup.rect.center
+        field = engine.current_targets()
+        best = None
+        for tier in range(len(field.tier_slices) - 1, -1, -1):         #the fastest tiers are worth the most
+            start, end = field.tier_slices[tier]
+            aim_x, aim_y = field.masks[tier].centroid()                  #the middle of the visible pixels
+            for row in range(start, end):
+                if not field.alive[row]:
+                    continue
+                x = field.draw_x[row] + aim_x
+                y = field.y[row] + aim_y
+                if 0 < x < WIDTH and 0 < y < HEIGHT - 200:
+                    distance = abs(x - self.mouse_pos[0]) + abs(y - self.mouse_pos[1])
+                    if best is None or distance < best[0]:
+                        best = (distance, x, y)
+            if best is not None:
+                return best[1], best[2]
+        return None
+
+    def frame_input(self, engine):
+        self.frame += 1
+        events = []
+        if not self.released:
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, button=1, pos=self.mouse_pos))
+            self.released = True
+        elif self.frame % self.reaction == 0 and engine.level > 0:
+            aim = self.pick_target(engine)
+            if aim is not None:
+                x = round(aim[0] + self.rng.gauss(0, self.aim_error))
+                y = round(aim[1] + self.rng.gauss(0, self.aim_error))
+                self.mouse_pos = (x, y)
+                events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=self.mouse_pos))
+                self.released = False
+        return FrameInput(self.mouse_pos, (not self.released, False, False), events)
+
+
+def init_worker():
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'                       #SDL would swallow the SIGTERM the pool stops its workers with
+    pygame.init()
+    worker['screen'] = pygame.display.set_mode([WIDTH, HEIGHT])
+    #the images are read once per worker, not once per game
+    worker['levels'] = load_levels()
+    worker['assets'] = AssetLoader(worker['levels'])
+
+
+#one game from the start of level 1 until game over, or until max_seconds of game time have passed
+def play_game(task):
+    cell, mode, seed, max_seconds = task
+    levels = {number: level.tuned(cell['counts'][number], cell['speed_base'])
+              for number, level in worker['levels'].items()}
+    engine = GameEngine(worker['screen'], scores_path=None, sound=False, show_facts=False,
+                        render_mode='none', seed=seed, levels=levels, ammo=cell['ammo'],
+                        time_limit=cell['time_limit'], assets=worker['assets'])
+    player = AimBot(random.Random(seed), cell['aim_error'], cell['reaction'])
+    engine.start_game(mode)
+    max_ticks = max_seconds * engine.tick_rate
+    reached = 1
+    while not engine.game_over and engine.game_ticks < max_ticks:
+        engine.step(player.frame_input(engine), 1 / engine.tick_rate)
+        reached = max(reached, engine.level)
+    engine.scores.close()
+    last = engine.last_level
+    completed = reached == last and engine.level_targets[last].cleared()
+    levels_cleared = reached - 1 + completed
+    return {'cell': cell['index'], 'mode': mode, 'seed': seed,
+            'points': engine.points, 'shots': engine.total_shots, 'hits': engine.hits,
+            'accuracy': engine.hits / engine.total_shots if engine.total_shots else 0.0,
+            'levels_cleared': levels_cleared, 'completed': completed,
+            'time': engine.time_passed, 'timed_out': not engine.game_over}
+
+
+def distribution(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {'mean': sum(ordered) / len(ordered), 'min': ordered[0], 'p10': percentile(ordered, 10),
+            'p50': percentile(ordered, 50), 'p90': percentile(ordered, 90), 'max': ordered[-1]}
+
+
+def aggregate(cells, games):
+    results = []
+    for cell in cells:
+        for mode in cell['modes']:
+            played = [game for game in games if game['cell'] == cell['index'] and game['mode'] == mode]
+            completed = [game for game in played if game['completed']]
+            results.append({'counts': cell['counts'], 'speed_base': cell['speed_base'], 'ammo': cell['ammo'],
+                            'time_limit': cell['time_limit'], 'aim_error': cell['aim_error'],
+                            'reaction': cell['reaction'], 'mode': MODES[mode], 'games': len(played),
+                            'completion_rate': len(completed) / len(played),
+                            'timed_out': sum(1 for game in played if game['timed_out']),
+                            'points': distribution([game['points'] for game in played]),
+                            'accuracy': distribution([game['accuracy'] for game in played]),
+                            'levels_cleared': distribution([game['levels_cleared'] for game in played]),
+                            #seconds to clear every level, over the games that did
+                            'completion_time': distribution([game['time'] for game in completed])})
+    return results
+
+
+def level_counts(levels):
+    return {number: [tier.count for tier in level.tiers] for number, level in levels.items()}
+
+
+#'10,5,3/12,8,5/15,12,8,3' -> {1: [10, 5, 3], 2: [12, 8, 5], 3: [15, 12, 8, 3]}
+def parse_counts(text):
+    levels = level_counts(load_levels())
+    counts = {level: [int(count) for count in tiers.split(',')] for level, tiers in enumerate(text.split('/'), 1)}
+    if len(counts) != len(levels):
+        raise argparse.ArgumentTypeError(f'{text}: expected counts for {len(levels)} levels')
+    for level, tiers in counts.items():
+        if len(tiers) != len(levels[level]):
+            raise argparse.ArgumentTypeError(f'{text}: level {level} has {len(levels[level])} tiers')
+        if min(tiers) < 1:
+            raise argparse.ArgumentTypeError(f'{text}: every tier needs at least one target')
+    return counts
+
+
+def main():
+    counts = level_counts(load_levels())
+    default_counts = '/'.join(','.join(str(count) for count in tiers) for tiers in counts.values())
+    parser = argparse.ArgumentParser(description='headless balance sweeps for Litter Ballista')
+    parser.add_argument('--counts', type=parse_counts, nargs='*', default=[counts],
+                        help=f'targets per tier, levels separated by / (default {default_counts})')
+    parser.add_argument('--speed-base', type=float, nargs='*', default=[None],
+                        help='tier i moves speed-base ** i times as fast as the first (default: the speeds in levels.json)')
+    parser.add_argument('--ammo', type=int, nargs='*', default=[81])
+    parser.add_argument('--time-limit', type=int, nargs='*', default=[30])
+    parser.add_argument('--aim-error', type=float, nargs='*', default=[12.0], help='aimbot aim error in pixels')
+    parser.add_argument('--reaction', type=int, nargs='*', default=[12], help='aimbot frames between shots')
+    parser.add_argument('--modes', type=int, nargs='*', default=list(MODES))
+    parser.add_argument('--games', type=int, default=100, help='games per cell and mode')
+    parser.add_argument('--max-seconds', type=int, default=300, help='game time before a freeplay game is given up on')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='results.json')
+    parser.add_argument('--csv', help='also write one row per game to this file')
+    args = parser.parse_args()
+
+    cells = []
+    for counts, speed_base, ammo, time_limit, aim_error, reaction in itertools.product(
+            args.counts, args.speed_base, args.ammo, args.time_limit, args.aim_error, args.reaction):
+        #the ammo only matters in accuracy mode and the time limit only in timed mode, so the
+        #other modes are only played for the first value of each
+        modes = [mode for mode in args.modes
+                 if (mode == 1 or ammo == args.ammo[0]) and (mode == 2 or time_limit == args.time_limit[0])]
+        if modes:
+            cells.append({'index': len(cells), 'counts': counts, 'speed_base': speed_base, 'ammo': ammo,
+                          'time_limit': time_limit, 'aim_error': aim_error, 'reaction': reaction, 'modes': modes})
+    tasks = [(cell, mode, game) for cell in cells for mode in cell['modes'] for game in range(args.games)]
+    #every game gets its own seed, so any single game can be played again from the CSV
+    tasks = [(cell, mode, args.seed * 1000003 + index, args.max_seconds)
+             for index, (cell, mode, _) in enumerate(tasks)]
+
+    print(f'{len(cells)} cells, {len(tasks)} games on {args.workers} workers')
+    start = time.perf_counter()
+    games = []
+    #small chunks keep every worker busy to the end even though freeplay games run much longer
+    chunksize = max(1, math.ceil(len(tasks) / (args.workers * 16)))
+    with Pool(args.workers, init_worker) as pool:
+        for game in pool.imap_unordered(play_game, tasks, chunksize):
+            games.append(game)
+            if len(games) % 100 == 0 or len(games) == len(tasks):
+                elapsed = time.perf_counter() - start
+                print(f'\r{len(games)}/{len(tasks)} games, {len(games) / elapsed:.1f} games/s', end='', flush=True)
+    print()
+    games.sort(key=lambda game: game['seed'])
+    elapsed = time.perf_counter() - start
+
+    results = aggregate(cells, games)
+    with open(args.out, 'w') as out:
+        json.dump({'games': len(games), 'workers': args.workers, 'seconds': elapsed, 'cells': results}, out, indent=2)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as out:
+            writer = csv.DictWriter(out, fieldnames=list(games[0]))
+            writer.writeheader()
+            writer.writerows(games)
+
+    print(f'{"counts":<26}{"mode":<10}{"speed":>6}{"ammo":>6}{"time":>6}{"aim":>6}{"react":>6}'
+          f'{"points p50":>12}{"accuracy":>10}{"cleared":>9}{"clear s p50":>13}')
+    for cell in results:
+        clear_time = cell['completion_time']['p50'] if cell['completion_time'] else '-'
+        counts = '/'.join(','.join(str(count) for count in tiers) for tiers in cell['counts'].values())
+        print(f'{counts:<26}{cell["mode"]:<10}{cell["speed_base"] or "-":>6}{cell["ammo"]:>6}{cell["time_limit"]:>6}'
+              f'{cell["aim_error"]:>6g}{cell["reaction"]:>6}{cell["points"]["p50"]:>12}'
+              f'{cell["accuracy"]["mean"]:>10.2f}{cell["completion_rate"]:>9.0%}{clear_time:>13}')
+    print(f'{len(games)} games in {elapsed:.1f} s, results written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
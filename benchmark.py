@@ -0,0 +1,387 @@
+# benchmark.py
+# headless frame-time benchmark. steps the game engine under the SDL dummy video/audio drivers
+# with a scripted player and no frame cap, and reports mean, p95 and p99 frame times for every
+# level and mode so we can tell when a change makes the game slower
+#
+#   python benchmark.py                      (all levels and modes, 600 frames each)
+#   python benchmark.py --frames 2000 --json bench.json
+#   python benchmark.py --swarm 500 2000 8000   (also run the last level as a swarm of that many targets)
+#   python benchmark.py --render full dirty texture   (compare the full-redraw, dirty-rect and SDL texture renderers)
+#   python benchmark.py --trace traces          (also write a per-phase CSV and Chrome trace for every case)
+#   python benchmark.py --particles 5000 20000  (level 1 with that many sparks kept flying)
+#   python benchmark.py --endless 60           (an hour of endless mode, frame time and memory per minute)
+#   python benchmark.py --assets 12             (walk every scene with a 12 MB picture budget and show what stays loaded)
+#   python benchmark.py --pacing 10             (CPU use of the menu and of play for 10 real seconds each,
+#                                                paced by a plain Clock.tick and by the FramePacer)
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import json
+import math
+import time
+import numpy as np
+import pygame
+from engine import GameEngine, FrameInput, WIDTH, HEIGHT
+from targets import TargetField
+from particles import ParticleSystem
+from pacing import FramePacer
+from render import FullRenderer
+from assets import AssetLoader
+from levels import load_levels
+from profiler import percentile
+
+MODES = {0: 'freeplay', 1: 'accuracy', 2: 'timed'}
+LEVELS = list(load_levels())
+
+
+#sweeps the mouse over the sky in a figure of eight and pulls the trigger every few frames
+class ScriptedPlayer:
+    def __init__(self, fire_every=15):
+        self.fire_every = fire_every
+
+    def frame_input(self, frame):
+        x = WIDTH / 2 + math.sin(frame * 0.05) * (WIDTH / 2 - 50)
+        y = 300 + math.sin(frame * 0.031) * 200
+        mouse_pos = (int(x), int(y))
+        events = []
+        pressed = False
+        if frame % self.fire_every == 0:
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=mouse_pos))
+            pressed = True
+        elif frame % self.fire_every == 1:
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, button=1, pos=mouse_pos))
+        return FrameInput(mouse_pos, (pressed, False, False), events)
+
+
+def summarize(times):
+    ordered = sorted(times)
+    return {'frames': len(times),
+            'mean_ms': sum(times) / len(times),
+            'p95_ms': percentile(ordered, 95),
+            'p99_ms': percentile(ordered, 99),
+            'max_ms': ordered[-1]}
+
+
+def print_stats(stats):
+    print(f'{stats["case"]:<32}{stats["frames"]:>8}{stats["mean_ms"]:>10.3f}'
+          f'{stats["p95_ms"]:>10.3f}{stats["p99_ms"]:>10.3f}{stats["max_ms"]:>10.3f}')
+
+
+#the sounds are decoded before the case starts, so every hit of every measured frame goes through the bank
+def make_engine(screen, swarm=0, render_mode='full', profile_frames=False):
+    engine = GameEngine(screen, scores_path=None, show_facts=False, swarm=swarm, render_mode=render_mode,
+                        profile_frames=profile_frames)
+    engine.audio.wait()
+    return engine
+
+
+#runs one level in one mode. if the scripted player clears the level or runs the game out
+#we put it straight back on the same level so every measured frame belongs to this case.
+#every frame advances the game by exactly 1/60 of a second, however long it took to run
+#particles keeps that many sparks alive the whole time, topped up every frame
+def run_case(screen, level, mode, frames, warmup, swarm=0, render_mode='full', trace=None, particles=0):
+    engine = make_engine(screen, swarm, render_mode, profile_frames=trace is not None)
+    if particles:
+        engine.particles = ParticleSystem(particles, 0)
+    player = ScriptedPlayer()
+    engine.start_game(mode, level)
+    times = []
+    latencies = []
+    clicked_at = None                                          #the frame of the last click that has not hit anything yet
+    for frame in range(warmup + frames):
+        if engine.level != level or engine.game_over:
+            engine.start_game(mode, level)
+        frame_input = player.frame_input(frame)
+        if any(event.type == pygame.MOUSEBUTTONDOWN for event in frame_input.events):
+            clicked_at = frame
+        hits = engine.hits
+        if particles:
+            spot = (WIDTH / 2 + math.cos(frame * 0.07) * 300, 300 + math.sin(frame * 0.07) * 150)
+            engine.particles.burst(spot, particles - engine.particles.live, 'gold', life=(1, 3))
+        engine.frame_profiler.begin_frame()
+        start = time.perf_counter()
+        engine.step(frame_input, 1 / 60)
+        engine.present()
+        elapsed = time.perf_counter() - start
+        engine.frame_profiler.end_frame()
+        if frame >= warmup:
+            times.append(elapsed * 1000)
+            #input-to-hit latency: the whole frames between the click and the hit, at 60 fps, plus the
+            #time the frame that shows the hit took
+            if clicked_at is not None and engine.hits > hits:
+                latencies.append((frame - clicked_at) * 1000 / 60 + elapsed * 1000)
+        if engine.hits > hits:
+            clicked_at = None
+    if trace is not None:
+        engine.frame_profiler.export_csv(trace + '.csv')
+        engine.frame_profiler.export_trace(trace + '.trace.json')
+    stats = summarize(times)
+    gun_cache = engine.gun_cache.stats()
+    if gun_cache['hits'] + gun_cache['misses']:                #the texture renderer turns the gun itself and never asks the cache
+        stats['gun_cache_hit_rate'] = gun_cache['hit_rate']
+    if render_mode == 'texture':
+        stats['texture_uploads'] = getattr(engine.renderer, 'uploads', None)
+    stats['hit_latency_ms'] = latencies
+    if engine.audio.enabled:                                   #how often the channel limits kicked in
+        stats['sound'] = engine.audio.stats()
+    engine.scores.close()
+    return stats
+
+
+#just the array work (move, wrap and one hit test) for a swarm, without any drawing.
+#this should stay flat as the swarm grows - what is left of the frame time is blitting
+def run_swarm_update(assets, size, frames, warmup):
+    field = TargetField.swarm(size, assets.levels[LEVELS[-1]], assets.level(LEVELS[-1]).masks)
+    player = ScriptedPlayer()
+    times = []
+    for frame in range(warmup + frames):
+        mouse_pos = player.frame_input(frame).mouse_pos
+        start = time.perf_counter()
+        field.move(1 / 60)
+        field.hit_test(mouse_pos)
+        elapsed = time.perf_counter() - start
+        if frame >= warmup:
+            times.append(elapsed * 1000)
+    return summarize(times)
+
+
+#runs in real time, paced like main.py, and measures how much CPU the process used. 'clock' is the
+#old loop - Clock.tick and a full frame every 1/60 s - and 'pacer' is the FramePacer
+def run_pacing(screen, scene, pacing, seconds, fps=60):
+    #no sound - the mixer thread would be most of what the menu costs
+    engine = GameEngine(screen, scores_path=None, sound=False, show_facts=False, render_mode='dirty')
+    player = ScriptedPlayer()
+    if scene == 'play':
+        engine.start_game(0, 1)
+    #the first frame starts reading the next level - that and the pages the engine read ahead when it
+    #was made are done before the clock starts, so the CPU time is only the loop's
+    engine.step(FrameInput((450, 300)))
+    engine.assets.settle()
+    clock = pygame.time.Clock()
+    pacer = FramePacer(fps)
+    intervals = []
+    frame = 0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    while time.perf_counter() - wall_start < seconds:
+        if scene == 'play' and (engine.level != 1 or engine.game_over):
+            engine.start_game(0, 1)
+        if pacing == 'pacer':
+            dt, _ = pacer.wait(engine.idle())
+            if pacer.timed_out:                                   #main.py draws nothing on these
+                engine.audio.poll()
+                continue
+        else:
+            dt = clock.tick(fps) / 1000
+        pygame.event.pump()
+        if frame:
+            intervals.append(dt * 1000)
+        frame_input = player.frame_input(frame) if scene == 'play' else FrameInput((450, 300))
+        engine.step(frame_input, dt)
+        engine.present()
+        frame += 1
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    engine.scores.close()
+    ordered = sorted(intervals) or [0.0]                          #the paced menu may draw a single frame
+    #how far the time between frames strays from 1/fps on average - only meaningful while playing
+    jitter = sum(abs(interval - 1000 / fps) for interval in intervals) / max(len(intervals), 1)
+    return {'case': f'{scene} ({pacing})', 'seconds': wall, 'frames': frame, 'cpu_percent': 100 * cpu / wall,
+            'interval_p50_ms': percentile(ordered, 50), 'interval_p99_ms': percentile(ordered, 99),
+            'jitter_ms': jitter}
+
+
+#just drawing a swarm's targets, the way draw_level does (one blits call per tier) and the way it
+#used to (one blit per target). the difference is the python overhead per target
+def run_swarm_draw(screen, assets, size, frames, warmup, batched):
+    level_assets = assets.level(LEVELS[-1])
+    field = TargetField.swarm(size, assets.levels[LEVELS[-1]], level_assets.masks)
+    images = level_assets.targets
+    renderer = FullRenderer(screen)
+    times = []
+    for frame in range(warmup + frames):
+        field.move(1 / 60)
+        start = time.perf_counter()
+        if batched:
+            field.draw(renderer, images, 0.5)
+        else:
+            alive = np.flatnonzero(field.alive)
+            prev_x = field.prev_x[alive]
+            xs = prev_x + (field.x[alive] - prev_x) * 0.5
+            for tier, x, y in zip(field.tier[alive].tolist(), xs.tolist(), field.y[alive].tolist()):
+                renderer.blit(images[tier], (x, y))
+        elapsed = time.perf_counter() - start
+        if frame >= warmup:
+            times.append(elapsed * 1000)
+    return summarize(times)
+
+
+#resident memory of this process in MB - from /proc where there is one, otherwise the peak so far
+def resident_mb():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+#minutes of endless mode as fast as it goes, with the scripted player and lives that never run out.
+#the target pool never grows, so every minute should take the same frame time and memory
+def run_endless(screen, minutes):
+    engine = GameEngine(screen, scores_path=None, sound=False, show_facts=False, render_mode='full',
+                        seed=0, endless_lives=10 ** 9)
+    player = ScriptedPlayer()
+    engine.start_game(3)
+    results = []
+    print(f'{"minute":>6}{"wave":>6}{"targets":>9}{"mean ms":>10}{"p99 ms":>10}{"memory MB":>11}')
+    frame = 0
+    for minute in range(1, minutes + 1):
+        times = []
+        for _ in range(60 * 60):
+            start = time.perf_counter()
+            engine.step(player.frame_input(frame), 1 / 60)
+            engine.present()
+            times.append((time.perf_counter() - start) * 1000)
+            frame += 1
+        field = engine.current_targets()
+        stats = summarize(times)
+        stats.update({'case': f'endless minute {minute}', 'wave': field.wave.number, 'targets': len(field),
+                      'memory_mb': resident_mb()})
+        results.append(stats)
+        print(f'{minute:>6}{stats["wave"]:>6}{stats["targets"]:>9}{stats["mean_ms"]:>10.3f}'
+              f'{stats["p99_ms"]:>10.3f}{stats["memory_mb"]:>11.1f}')
+    engine.scores.close()
+    return results
+
+
+#goes through every scene the way a player would, with at most budget_mb of pictures kept, and
+#prints how long each scene change took to get its pictures and what was resident afterwards
+def run_assets(budget_mb):
+    levels = load_levels()
+    budget = None if budget_mb is None else budget_mb * 2 ** 20
+    assets = AssetLoader(levels, budget=budget)
+    scenes = [('menu', ())] + [(f'level {n}', (f'level{n}',)) for n in levels]
+    scenes += [('pause', ('common', f'level{LEVELS[-1]}')), ('game over', ('common',)), ('level 1 again', ('level1',))]
+    results = []
+    print(f'{"asset scene":<32}{"load ms":>10}{"resident MB":>13}{"evicted":>9}   (budget '
+          f'{"none" if budget is None else f"{budget_mb:g} MB"})')
+    for name, pages in scenes:
+        start = time.perf_counter()
+        assets.use(*pages)
+        for page in pages:
+            if page.startswith('level'):
+                assets.level(int(page[len('level'):]))
+        elapsed = (time.perf_counter() - start) * 1000
+        stats = {'case': f'assets {name}', 'load_ms': elapsed, 'resident_mb': assets.resident_bytes() / 2 ** 20,
+                 'evictions': assets.evictions}
+        results.append(stats)
+        print(f'{stats["case"]:<32}{elapsed:>10.2f}{stats["resident_mb"]:>13.2f}{assets.evictions:>9}')
+    print(f'{"resident picture":<40}{"page":<10}{"KB":>10}')
+    for name, (page, size, pinned) in sorted(assets.report().items(), key=lambda item: -item[1][1]):
+        print(f'{name:<40}{page:<10}{size / 1024:>10.1f}{"  pinned" if pinned else ""}')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='headless frame-time benchmark for Litter Ballista')
+    parser.add_argument('--frames', type=int, default=600, help='measured frames per case')
+    parser.add_argument('--warmup', type=int, default=60, help='frames to run before measuring')
+    parser.add_argument('--levels', type=int, nargs='*', default=LEVELS)
+    parser.add_argument('--modes', type=int, nargs='*', default=list(MODES))
+    parser.add_argument('--swarm', type=int, nargs='*', default=[], help='swarm sizes to run on the last level in freeplay')
+    parser.add_argument('--particles', type=int, nargs='*', default=[], help='live particle counts to run level 1 with')
+    parser.add_argument('--endless', type=int, help='game minutes of endless mode to run')
+    parser.add_argument('--assets', type=float, nargs='?', const=-1,
+                        help='walk every scene with this many MB of pictures kept (no value: no budget)')
+    parser.add_argument('--pacing', type=float, help='real seconds to run each frame pacing case for')
+    parser.add_argument('--render', nargs='*', default=['full'], choices=['full', 'dirty', 'texture'])
+    parser.add_argument('--trace', help='directory to write a per-phase CSV and Chrome trace for each case to')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    pygame.init()
+    #the texture renderer draws with the renderer a pygame.SCALED display gets, the software ones work on either
+    screen = pygame.display.set_mode([WIDTH, HEIGHT], pygame.SCALED if 'texture' in args.render else 0)
+
+    assets = AssetLoader(load_levels())
+    results = []
+    print(f'{"case":<32}{"frames":>8}{"mean ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+    try:
+        for render_mode in args.render:
+            for level in args.levels:
+                for mode in args.modes:
+                    trace = None
+                    if args.trace:
+                        os.makedirs(args.trace, exist_ok=True)
+                        trace = os.path.join(args.trace, f'level{level}-{MODES[mode]}-{render_mode}')
+                    stats = run_case(screen, level, mode, args.frames, args.warmup,
+                                     render_mode=render_mode, trace=trace)
+                    stats['case'] = f'level {level} {MODES[mode]}'
+                    if render_mode != 'full':
+                        stats['case'] += f' ({render_mode})'
+                    results.append(stats)
+                    print_stats(stats)
+        #a flat line here means the per-target cost is not growing with the target count
+        for size in args.swarm:
+            for render_mode in args.render:
+                stats = run_case(screen, LEVELS[-1], 0, args.frames, args.warmup, swarm=size, render_mode=render_mode)
+                stats['case'] = f'swarm {size}'
+                if render_mode != 'full':
+                    stats['case'] += f' ({render_mode})'
+                results.append(stats)
+                print_stats(stats)
+            stats = run_swarm_update(assets, size, args.frames, args.warmup)
+            stats['case'] = f'swarm {size} update'
+            results.append(stats)
+            print_stats(stats)
+            for batched, how in ((False, 'blit each'), (True, 'blits')):
+                stats = run_swarm_draw(screen, assets, size, args.frames, args.warmup, batched)
+                stats['case'] = f'swarm {size} draw ({how})'
+                results.append(stats)
+                print_stats(stats)
+        for count in args.particles:
+            for render_mode in args.render:
+                stats = run_case(screen, 1, 0, args.frames, args.warmup, render_mode=render_mode, particles=count)
+                stats['case'] = f'particles {count}'
+                if render_mode != 'full':
+                    stats['case'] += f' ({render_mode})'
+                results.append(stats)
+                print_stats(stats)
+        if args.endless:
+            results += run_endless(screen, args.endless)
+        if args.assets is not None:
+            results += run_assets(None if args.assets < 0 else args.assets)
+        if args.pacing:
+            print(f'{"pacing case":<32}{"frames":>8}{"CPU %":>10}{"p50 ms":>10}{"p99 ms":>10}{"jitter ms":>11}'
+                  f'   (time between frames)')
+            for scene in ('menu', 'play'):
+                for pacing in ('clock', 'pacer'):
+                    stats = run_pacing(screen, scene, pacing, args.pacing)
+                    results.append(stats)
+                    print(f'{stats["case"]:<32}{stats["frames"]:>8}{stats["cpu_percent"]:>10.1f}'
+                          f'{stats["interval_p50_ms"]:>10.2f}{stats["interval_p99_ms"]:>10.2f}{stats["jitter_ms"]:>11.2f}')
+        rates = [stats['gun_cache_hit_rate'] for stats in results if 'gun_cache_hit_rate' in stats]
+        if rates:
+            print(f'gun sprite cache hit rate: {100 * sum(rates) / len(rates):.1f}%')
+        sounds = [stats['sound'] for stats in results if 'sound' in stats]
+        if sounds:
+            print(f'sound effects: {sum(sound["plays"] for sound in sounds)} played, '
+                  f'{sum(sound["dropped"] for sound in sounds)} dropped inside their gap, '
+                  f'{sum(sound["stolen"] for sound in sounds)} cut off another voice')
+        latencies = sorted(latency for stats in results for latency in stats.pop('hit_latency_ms', []))
+        if latencies:
+            print(f'input-to-hit latency over {len(latencies)} hits: mean {sum(latencies) / len(latencies):.2f} ms, '
+                  f'p95 {percentile(latencies, 95):.2f} ms, max {latencies[-1]:.2f} ms')
+    finally:
+        pygame.quit()
+
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
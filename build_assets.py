@@ -0,0 +1,69 @@
+# build_assets.py
+# asset build step. scales every picture to the size the game draws it at and packs each level's
+# pictures (and the menus) into one atlas page, with a manifest saying where each picture is.
+# assets.py picks the atlas up automatically, so startup decodes a few small pages instead of
+# dozens of full-size PNGs
+#
+#   python build_assets.py               (writes assets/build/*.png and assets/build/manifest.json)
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import json
+import pygame
+from assets import BUILD_DIR, level_sprites, menu_sprites, common_sprites
+from levels import load_levels
+
+PAGE_WIDTH = 1024
+PADDING = 1                                                           #keeps neighbours from bleeding into each other
+
+
+#shelf packing: tallest pictures first, left to right, starting a new shelf when a row is full
+def pack(images):
+    placed = {}
+    x = y = shelf_height = 0
+    for name in sorted(images, key=lambda name: images[name].get_height(), reverse=True):
+        width, height = images[name].get_size()
+        if x + width > PAGE_WIDTH:
+            x = 0
+            y += shelf_height + PADDING
+            shelf_height = 0
+        placed[name] = (x, y, width, height)
+        x += width + PADDING
+        shelf_height = max(shelf_height, height)
+    return placed, y + shelf_height
+
+
+def build_page(page, sprites, manifest):
+    images = {}
+    for name, (path, size, opaque) in sprites.items():
+        image = pygame.image.load(path)
+        if size is not None:
+            image = pygame.transform.scale(image, size)
+        images[name] = image
+    placed, height = pack(images)
+    sheet = pygame.Surface((PAGE_WIDTH, height), pygame.SRCALPHA)
+    for name, rect in placed.items():
+        sheet.blit(images[name], rect[:2], special_flags=pygame.BLEND_RGBA_MAX)   #copy the pixels and alpha exactly
+        manifest['sprites'][name] = {'page': page, 'rect': list(rect), 'opaque': sprites[name][2], 'source': sprites[name][0]}
+    filename = f'{page}.png'
+    pygame.image.save(sheet, os.path.join(BUILD_DIR, filename))
+    manifest['pages'][page] = filename
+    print(f'{filename}: {len(placed)} pictures, {PAGE_WIDTH}x{height}')
+
+
+def main():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    manifest = {'pages': {}, 'sprites': {}}
+    build_page('menu', menu_sprites(), manifest)
+    build_page('common', common_sprites(), manifest)
+    for number, level in load_levels().items():
+        build_page(f'level{number}', level_sprites(level), manifest)
+    with open(os.path.join(BUILD_DIR, 'manifest.json'), 'w') as file:
+        json.dump(manifest, file, indent=2)
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
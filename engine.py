@@ -0,0 +1,607 @@
+# engine.py
+# all of the game state lives in GameEngine so that the game can be stepped one frame at a time,
+# either by main.py with a real window or headless (SDL dummy video driver) by benchmark.py
+# with scripted inputs and no frame cap
+import math
+import random
+import pygame
+#other imports from files
+from fact_popup import FactPopup
+from powerups import PowerUpManager, AMMO_REFILL
+from particles import ParticleSystem
+from targets import TargetField
+from waves import EndlessField
+from levels import load_levels
+from render import renderers
+from sprite_cache import GunSpriteCache
+from text_cache import TextCache, NumberText, HudField
+from assets import AssetLoader
+from audio import SoundBank
+from startup import StartupProfiler
+from profiler import FrameProfiler
+from scores import ScoreStore
+
+#dimensions
+WIDTH = 900
+HEIGHT = 800
+
+#sparks per hit and per power-up picked up
+HIT_PARTICLES = 40
+PICKUP_PARTICLES = 120
+
+#the only events the game reacts to. main.py blocks every other type, so mouse motion and the other
+#window events never pile up in the queue - the mouse position comes from pygame.mouse.get_pos instead
+EVENT_TYPES = (pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.KEYDOWN)
+#the window was uncovered or restored and lost what was on it - the next present pushes the whole frame
+REPAINT_EVENTS = (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.VIDEOEXPOSE)
+
+
+def filter_events():
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(EVENT_TYPES + REPAINT_EVENTS)
+
+
+#everything the player did during one frame - where the mouse is, which buttons are held down
+#and the events pygame handed us. main.py builds it from pygame once at the start of the frame,
+#benchmark.py builds it from a script
+class FrameInput:
+    def __init__(self, mouse_pos=(0, 0), clicks=(False, False, False), events=()):
+        self.mouse_pos = mouse_pos
+        self.clicks = clicks
+        self.events = events
+
+    #woken_by is whatever the frame pacer already took off the queue while it waited
+    @classmethod
+    def from_pygame(cls, woken_by=()):
+        events = list(woken_by) + pygame.event.get()
+        return cls(pygame.mouse.get_pos(), pygame.mouse.get_pressed(), events)
+
+
+class GameEngine:
+    def __init__(self, screen, scores_path='scores.db', sound=True, show_facts=True, swarm=0,
+                 render_mode='full', gun_angle_step=2, gun_cache_size=256, profiler=None,
+                 profile_frames=False, seed=None, levels=None, ammo=81, time_limit=30,
+                 assets=None, particle_cap=20000, endless_lives=20, asset_budget=None):
+        profiler = profiler or StartupProfiler()
+        self.screen = screen
+        self.renderer = renderers[render_mode](screen)               #'full' redraws everything, 'dirty' only what changed, 'texture' draws with SDL's renderer
+        self.show_facts = show_facts                                 #headless runs turn the fact popup off so nothing waits for a keypress
+        self.swarm = swarm                                           #stress builds: replace the last level with a swarm of this many targets
+        #every random choice the game makes comes from here, so a seed and the inputs replay a session exactly
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.rng = random.Random(self.seed)
+        #the levels from levels.json, level number -> Level. batch_sim.py hands in tuned copies
+        self.levels = levels or load_levels()
+        self.last_level = len(self.levels)
+        #the balance knobs - batch_sim.py sweeps these, the game itself always uses the defaults
+        self.start_ammo = ammo                                       #shots in accuracy mode
+        self.time_limit = time_limit                                 #seconds in timed mode
+        self.endless_lives = endless_lives                           #targets that can escape before an endless game is over
+
+        #set up variables
+        self.fps = 60                                                #how often frames are drawn, the simulation does not depend on it
+        self.tick_rate = 60                                          #simulation ticks per second
+        self.max_frame_time = 0.25
+        self.accumulator = 0.0
+        self.game_ticks = 0
+
+        #fonts
+        with profiler.phase('fonts'):
+            self.font = pygame.font.Font('assets/font/myFont.ttf', 32)
+            self.big_font = pygame.font.Font('assets/font/myFont.ttf', 60)
+
+        #rendered text is cached, and each line of the HUD is only rebuilt when its value changes
+        self.text_cache = TextCache()
+        self.numbers = NumberText(self.text_cache, self.font, 'black')
+        self.hud_points = HudField((320, 660), lambda value: self.numbers.render('Points: ', value))
+        self.hud_shots = HudField((320, 687), lambda value: self.numbers.render('Total Shots: ', value))
+        self.hud_time = HudField((320, 714), lambda value: self.numbers.render('Time Elapsed: ', value))
+        self.hud_mode = HudField((320, 741), self.render_mode_text)
+        self.fact_popup = FactPopup(self.font, (WIDTH, HEIGHT), self.rng)
+        #where each frame's time goes, F3 shows it on screen
+        self.frame_profiler = FrameProfiler(profile_frames)
+
+        #LOADING THE IMAGES - only the main menu up front, the rest is read in the background while the menu is up.
+        #tools that make many engines in a row can hand the same loader to each of them
+        with profiler.phase('menu images'):
+            self.assets = assets or AssetLoader(self.levels, budget=asset_budget)   #bytes of pictures to keep, None keeps them all
+            self.menu_img = self.assets.menu['menus/mainMenu']
+        self.assets.prefetch('common')
+        self.assets.prefetch_level(1)
+
+        self.level = 0
+        self.points = 0
+        self.total_shots = 0
+        self.hits = 0
+
+        #for mode 0=freeplay, 1=accuracy, 2=timed, 3=endless
+        self.mode = 0
+        self.ammo = 0
+        self.time_passed = 0
+        self.time_remaining = 0
+        self.counter = 1
+        self.best_freeplay = 0
+        self.best_ammo = 0
+        self.best_timed = 0
+        self.best_endless = 0
+
+        self.shots = []                                              #where this frame's clicks landed
+        self.menu = True
+        self.game_over = False
+        self.pause = False
+        self.clicked = False
+        self.new_coords = True
+        self.run = True
+        self.resume_level = 0
+
+        #powerups
+        self.powerups = PowerUpManager(WIDTH, HEIGHT, self.assets.menu['powerups/score_multiplier'], self.rng)
+        #hit and pickup sparks, at most particle_cap at once
+        self.particles = ParticleSystem(particle_cap, self.seed)
+
+        #the targets of each level played so far, one TargetField (numpy rows) per level
+        self.level_targets = {}
+
+        #input for the frame that is being stepped
+        self.mouse_pos = (0, 0)
+        self.clicks = (False, False, False)
+
+        #flipped and rotated guns, rounded to gun_angle_step degrees
+        self.gun_cache = GunSpriteCache(lambda index: self.assets.level(index + 1).gun, gun_angle_step, gun_cache_size)
+        self.assets.watch(self.derived_pictures, self.forget_derived)
+        self.shown_scene = None                                      #the scene of the last frame, to notice when it changes
+        #scores_path None keeps this run's scores in memory, for the headless tools
+        with profiler.phase('high scores'):
+            self.scores = ScoreStore(scores_path)
+            self.read_scores()
+        #ADDING SOUNDS - decoded on a background thread, hits are silent until they are ready
+        with profiler.phase('start audio loader'):
+            self.audio = SoundBank(sound)
+        self.play_music()
+
+    #the best score of each mode from the score store. after this the bests are kept up to date here
+    #and every finished game is handed to the store, which saves it on its own thread
+    def read_scores(self):
+        self.best_freeplay, self.best_ammo, self.best_timed, self.best_endless = self.scores.bests()
+
+    def play_music(self):
+        self.audio.play_music()
+
+    #starting a new game from the main menu
+    def start_game(self, mode, level=1):
+        self.mode = mode
+        self.level = level
+        self.menu = False
+        self.game_over = False
+        self.pause = False
+        self.time_passed = 0
+        self.total_shots = 0
+        self.hits = 0
+        self.points = 0
+        self.clicked = True
+        self.new_coords = True
+        self.shots.clear()
+        self.powerups.reset()
+        self.particles.clear()
+        if mode == 1:
+            self.ammo = self.start_ammo
+        if mode == 2:
+            self.time_remaining = self.time_limit
+
+    #TO DISPLAY THE SCORE OF EACH OF THE MODES
+    def draw_score(self):
+        screen = self.renderer
+        self.hud_points.draw(screen, self.points)
+        self.hud_shots.draw(screen, self.total_shots)
+        self.hud_time.draw(screen, self.time_passed)
+        if self.mode == 1:
+            self.hud_mode.draw(screen, (1, self.ammo))
+        elif self.mode == 2:
+            self.hud_mode.draw(screen, (2, self.time_remaining))
+        elif self.mode == 3:
+            self.hud_mode.draw(screen, (3, self.endless_lives - self.current_targets().escaped))
+        else:
+            self.hud_mode.draw(screen, (0, 0))
+        status = self.powerups.status()
+        if status:
+            screen.blit(self.text_cache.render(self.font, status, 'red'), (320, 768))
+
+    def render_mode_text(self, value):
+        mode, number = value
+        if mode == 1:
+            return self.numbers.render('Ammo Remaining: ', number)
+        if mode == 2:
+            return self.numbers.render('Time Remaining ', number)
+        if mode == 3:
+            return self.numbers.render('Lives: ', number)
+        return self.text_cache.render(self.font, 'Freeplay!', 'black')
+
+    #making the gun and making it rotate to shoot
+    def draw_gun(self):
+        screen = self.renderer
+        level = self.level
+        mouse_pos = self.mouse_pos
+        gun_point = (WIDTH / 2, HEIGHT - 200)
+        laser = self.levels[level].laser
+        clicks = self.clicks                                                            #storing the clicked status of the mouse in a list
+        if mouse_pos[0] != gun_point[0]:
+            slope = (mouse_pos[1] - gun_point[1]) / (mouse_pos[0] - gun_point[0])
+        else:
+            slope = -100000                                                              #setting a very high negative slope
+
+        angle = math.atan(slope)                                                         #inverse tangent of slope of a line = angle between horizontal axis and the line
+        rotation = math.degrees(angle)                                                   #converting to degrees
+
+        if mouse_pos[0] < WIDTH / 2:                                                     #if mouse position is on left of the screen we need to flip the gun to look natural
+            if mouse_pos[1] < 600:
+                screen.blit_rotated(self.gun_cache, level - 1, True, 90 - rotation, (WIDTH / 2 - 90, HEIGHT - 250))
+                if clicks[0]:
+                    screen.circle(laser, mouse_pos, 5)
+        else:
+            if mouse_pos[1] < 600:
+                screen.blit_rotated(self.gun_cache, level - 1, False, 270 - rotation, (WIDTH / 2 - 30, HEIGHT - 250))
+                if clicks[0]:
+                    screen.circle(laser, mouse_pos, 5)                                  #drawing a small circle in the color of our gun of radius 5
+
+    #moving between the levels
+    def move_level(self, field, dt):
+        field.move(dt)                                                                     # anything that moves off the left comes back in on the right
+
+    #what to do when we are drawing a level- drawing all the enemies
+    def draw_level(self, field, alpha=1.0):
+        field.draw(self.renderer, self.assets.level(self.level).targets, alpha)
+
+    #checking when we have shot - each shot hits the topmost target under it, so several clicks
+    #in one frame each take out their own target
+    def check_shot(self, field):
+        for pos in self.shots:
+            index = field.hit_test(pos)
+            if index < 0:
+                continue
+            field.kill(index)
+            self.hits += 1
+            level = self.levels[self.level]
+            tier_index = int(field.tier[index])
+            tier = level.tiers[tier_index]                                              #whichever tier the target is in - different points for different tiers
+            self.points += tier.points * self.powerups.multiplier
+            self.audio.play(level.hit_sound)
+            box_x, box_y, width, height = field.hitboxes[tier_index]
+            center = (field.draw_x[index] + box_x + width / 2, field.y[index] + box_y + height / 2)
+            self.particles.burst(center, HIT_PARTICLES, level.laser)
+
+    #the menu, game over and pause images are drawn as the scene background by the renderer
+    def draw_menu(self):
+        screen = self.renderer
+        font = self.font
+        self.game_over = False
+        self.pause = False
+        mouse_pos = self.mouse_pos
+        clicks = self.clicks
+        freeplay_button = pygame.rect.Rect((170, 524), (260, 100))
+        screen.blit(self.text_cache.render(font, f'{self.best_freeplay}', 'black'), (340, 580))
+        ammo_button = pygame.rect.Rect((475, 524), (260, 100))
+        screen.blit(self.text_cache.render(font, f'{self.best_ammo}', 'black'), (650, 580))
+        timed_button = pygame.rect.Rect((170, 661), (260, 100))
+        screen.blit(self.text_cache.render(font, f'{self.best_timed}', 'black'), (350, 710))
+        reset_button = pygame.rect.Rect((475, 661), (260, 100))
+        endless = self.text_cache.render(font, f'Press E for endless! Best: {self.best_endless}', 'gold')
+        screen.blit(endless, ((WIDTH - endless.get_width()) // 2, 450))
+        if freeplay_button.collidepoint(mouse_pos) and clicks[0] and not self.clicked:
+            self.start_game(0)
+        if ammo_button.collidepoint(mouse_pos) and clicks[0] and not self.clicked:
+            self.start_game(1)
+        if timed_button.collidepoint(mouse_pos) and clicks[0] and not self.clicked:
+            self.start_game(2)
+        if reset_button.collidepoint(mouse_pos) and clicks[0] and not self.clicked:
+            self.best_freeplay = 0
+            self.best_ammo = 0
+            self.best_timed = 0
+            self.best_endless = 0
+            self.clicked = True
+            self.scores.reset()
+
+    def draw_game_over(self):
+        if self.mode == 0:
+            display_score = self.time_passed
+        else:
+            display_score = self.points
+        mouse_pos = self.mouse_pos
+        clicks = self.clicks
+        exit_button = pygame.rect.Rect((170, 661), (260, 100))
+        menu_button = pygame.rect.Rect((475, 661), (260, 100))
+        self.renderer.blit(self.text_cache.render(self.big_font, f'{display_score}', 'black'), (650, 570))
+        if menu_button.collidepoint(mouse_pos) and clicks[0] and not self.clicked:
+            self.clicked = True
+            self.level = 0
+            self.pause = False
+            self.game_over = False
+            self.menu = True
+            self.points = 0
+            self.total_shots = 0
+            self.hits = 0
+            self.time_passed = 0
+            self.time_remaining = 0
+        if exit_button.collidepoint(mouse_pos) and clicks[0] and not self.clicked:
+            self.run = False
+
+    def draw_pause(self):
+        mouse_pos = self.mouse_pos
+        clicks = self.clicks
+        resume_button = pygame.rect.Rect((170, 661), (260, 100))
+        menu_button = pygame.rect.Rect((475, 661), (260, 100))
+        if resume_button.collidepoint(mouse_pos) and clicks[0] and not self.clicked:
+            self.level = self.resume_level
+            self.pause = False
+            self.clicked = True
+        if menu_button.collidepoint(mouse_pos) and clicks[0] and not self.clicked:
+            self.play_music()
+            self.level = 0
+            self.pause = False
+            self.menu = True
+            self.points = 0
+            self.total_shots = 0
+            self.hits = 0
+            self.time_passed = 0
+            self.time_remaining = 0
+            self.clicked = True
+            self.new_coords = True
+
+    def init_coords(self):
+        # every level starts again from its spawn layout the next time it is played
+        self.level_targets = {}
+        self.new_coords = False
+
+    def make_targets(self, number):
+        level = self.levels[number]
+        self.assets.use(*self.scene_pages(number))                    #pinned before its pictures load, so a small budget cannot drop them
+        masks = self.assets.level(number).masks
+        if self.mode == 3:
+            return EndlessField(level, masks, self.rng.randrange(2 ** 32))
+        if self.swarm and number == self.last_level:
+            return TargetField.swarm(self.swarm, level, masks)
+        return TargetField.from_level(level, masks)
+
+    def handle_events(self, events):
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.run = False
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                mouse_position = event.pos
+                if (0 < mouse_position[0] < WIDTH) and (0 < mouse_position[1] < HEIGHT - 200):
+                    self.shots.append(mouse_position)
+                    kind = self.powerups.collide(mouse_position)
+                    if kind is not None:
+                        self.particles.burst(mouse_position, PICKUP_PARTICLES, 'gold', life=(.5, 1.2))
+                    if kind == 'ammo_refill' and self.mode == 1:
+                        self.ammo += AMMO_REFILL
+                    self.total_shots += 1
+                    if self.mode == 1:
+                        self.ammo -= 1
+                if (670 < mouse_position[0] < 860) and (660 < mouse_position[1] < 715):
+                    self.resume_level = self.level
+                    self.pause = True
+                    self.clicked = True
+                if (670 < mouse_position[0] < 860) and (715 < mouse_position[1] < 760):
+                    self.menu = True
+                    self.play_music()
+                    self.clicked = True
+                    self.new_coords = True
+            if event.type == pygame.MOUSEBUTTONUP and event.button == 1 and self.clicked:
+                self.clicked = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.frame_profiler.toggle_overlay()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_e and self.menu:
+                self.start_game(3)                                   #endless waves of the first level's targets
+
+    #what to do next when a level is over
+    def check_level_end(self):
+        cleared = self.current_targets().cleared()
+        if cleared and self.level < self.last_level:
+            if self.show_facts:
+                self.fact_popup.open()                   # ⬅️ show a random fact, the game waits until it is closed
+            self.level += 1
+            self.new_coords = True              # Reset enemy positions
+            cleared = False                     # the next level has only just started
+        if (self.level == self.last_level and cleared) or (self.mode == 1 and self.ammo == 0) or (
+                self.mode == 2 and self.time_remaining == 0) or (
+                self.mode == 3 and self.current_targets().escaped >= self.endless_lives):
+            self.new_coords = True
+
+            self.play_music()
+
+            #we need to track whats the actual score there and rewrite the best score if its greater than the older score
+
+            #freeplay = in freeplay mode the time should be less than the older time or it should be 0 (when we have never played before)
+            if self.mode == 0:
+                if self.time_passed < self.best_freeplay or self.best_freeplay == 0:
+                    self.best_freeplay = self.time_passed
+
+            #accuracy mode = points should be greater thna old score then overwirte the score
+            if self.mode == 1:
+                if self.points > self.best_ammo:
+                    self.best_ammo = self.points
+
+            #timed mode = the points should be greater than old score then overwrite the score
+            if self.mode == 2:
+                if self.points > self.best_timed:
+                    self.best_timed = self.points
+
+            #endless = points, like timed mode
+            if self.mode == 3:
+                if self.points > self.best_endless:
+                    self.best_endless = self.points
+
+            #every game goes into the score history, saved in the background so game over does not hitch
+            score = self.time_passed if self.mode == 0 else self.points
+            self.scores.record(self.mode, score, self.points, self.total_shots, self.hits, self.time_passed)
+            self.game_over = True
+
+    #which full-screen picture is behind everything this frame
+    def scene(self):
+        if self.menu:
+            return 'menu'
+        if self.pause:
+            return 'pause'
+        if self.game_over:
+            return 'game_over'
+        return self.level
+
+    def scene_layers(self, scene):
+        if scene == 'menu':
+            return [(self.menu_img, (0, 0))]
+        if scene == 'pause':
+            return [(self.assets.common('menus/pause'), (0, 0))]
+        if scene == 'game_over':
+            return [(self.assets.common('menus/gameOver'), (0, 0))]
+        level_assets = self.assets.level(scene)
+        return [(level_assets.bg, (0, 0)), (level_assets.banner, (0, HEIGHT - 200))]
+
+    #the asset pages a scene draws from, which a memory budget must not throw away while it is up
+    def scene_pages(self, scene):
+        if scene == 'menu':
+            return ()
+        if scene == 'pause':
+            return ('common', f'level{self.resume_level}')              #the level comes straight back after the pause
+        if scene == 'game_over':
+            return ('common',)
+        return (f'level{scene}',)
+
+    #the pictures made from a page's pictures - the dirty renderer's flattened scene backgrounds and
+    #the rotated guns - so the asset budget counts them and drops them with the page
+    def derived_pictures(self, page):
+        pictures = {}
+        for scene, background in getattr(self.renderer, 'backgrounds', {}).items():   #only the dirty renderer keeps backgrounds
+            if (self.scene_pages(scene) or ('menu',))[0] == page:
+                pictures[f'background {scene}'] = background
+        if page.startswith('level'):
+            index = int(page[len('level'):]) - 1
+            for (gun, flipped, angle), sprite in self.gun_cache.sprites.items():
+                if gun == index:
+                    pictures[f'guns/{index + 1} {"flipped " if flipped else ""}{angle}'] = sprite
+        return pictures
+
+    def forget_derived(self, page):
+        backgrounds = getattr(self.renderer, 'backgrounds', {})
+        for scene in [scene for scene in backgrounds if (self.scene_pages(scene) or ('menu',))[0] == page]:
+            del backgrounds[scene]
+        if page.startswith('level'):
+            self.gun_cache.forget(int(page[len('level'):]) - 1)
+
+    #the screens that do not move - the frame pacer waits for input on these instead of redrawing them
+    def idle(self):
+        return self.menu or self.pause or self.game_over or self.fact_popup.is_open()
+
+    #push this frame to the display
+    def present(self):
+        with self.frame_profiler.phase('present'):
+            self.renderer.present()
+
+    #one fixed tick of the simulation. the game always advances in ticks of 1/tick_rate seconds no matter
+    #how fast frames are being drawn, so a dropped frame no longer slows the clock or the targets down
+    def update(self, dt):
+        profile = self.frame_profiler.phase
+        self.game_ticks += 1
+
+        if self.level != 0:
+            if self.counter < self.tick_rate:                   #a second is tick_rate ticks
+                self.counter += 1
+            else:
+                self.counter = 1
+                self.time_passed += 1
+                if self.mode == 2:
+                    self.time_remaining -= 1
+
+        if self.level > 0:
+            #power-ups only move, spawn and run out while a level is being played
+            with profile('powerups'):
+                self.powerups.update(dt, self.mode)
+            with profile('particles'):
+                self.particles.update(dt)
+            field = self.current_targets()
+            with profile('move_level'):
+                self.move_level(field, dt * self.powerups.time_scale)
+
+    def current_targets(self):
+        if self.new_coords:
+            with self.frame_profiler.phase('init coords'):
+                self.init_coords()
+        field = self.level_targets.get(self.level)
+        if field is None:
+            field = self.level_targets[self.level] = self.make_targets(self.level)
+        return field
+
+    #one frame of the game, everything the old while loop in main.py did apart from the tick and present().
+    #dt is how many seconds have passed since the last frame - the simulation catches up on that many
+    #fixed ticks and the targets are drawn part of the way between the last two ticks
+    def step(self, frame_input, dt=None):
+        if dt is None:
+            dt = 1 / self.tick_rate                             #one tick per frame, as if running at exactly 60 fps
+        self.mouse_pos = frame_input.mouse_pos
+        self.clicks = frame_input.clicks
+        profile = self.frame_profiler.phase
+        self.audio.poll()                                       #picks the sounds up once the loader thread has decoded them
+        if any(event.type in REPAINT_EVENTS for event in frame_input.events):
+            self.renderer.repaint()                             #also while a fact is up, or the popup would stay wiped
+
+        #while a fact is up the game is frozen - the loop keeps running so the popup only needs the events
+        if self.fact_popup.is_open():
+            for event in frame_input.events:
+                if event.type == pygame.QUIT:
+                    self.run = False
+            if not self.fact_popup.handle(frame_input.events):
+                self.fact_popup.draw(self.renderer)
+            return
+
+        #this frame's clicks are handled before the simulation moves on, so a shot is tested against the
+        #targets the player was looking at when they clicked and the hit shows up in this very frame
+        with profile('events'):
+            self.handle_events(frame_input.events)
+        if self.level > 0 and self.shots:
+            with profile('check_shot'):
+                self.check_shot(self.current_targets())
+        self.shots.clear()
+
+        tick = 1 / self.tick_rate
+        self.accumulator += min(dt, self.max_frame_time)        #after a long stall, slow down rather than spiral
+        while self.accumulator + 1e-9 >= tick:                  #the epsilon stops rounding from losing a tick now and then
+            self.update(tick)
+            self.accumulator -= tick
+        alpha = max(self.accumulator, 0.0) / tick
+
+        with profile('background'):
+            scene = self.scene()
+            self.assets.use(*self.scene_pages(scene))
+            if scene != self.shown_scene:                       #read the level that comes next while this one is up
+                self.shown_scene = scene
+                if scene == 'menu':
+                    self.assets.prefetch_level(1)
+                elif isinstance(scene, int):
+                    self.assets.prefetch_level(scene + 1)
+            self.renderer.begin(scene, self.scene_layers)
+        if self.level > 0:                                      #the menu screens cover the power-ups completely
+            self.powerups.draw(self.renderer)
+        with profile('menus'):
+            if self.menu:
+                self.level = 0
+                self.draw_menu()
+            if self.game_over:
+                self.level = 0
+                self.draw_game_over()
+            if self.pause:
+                self.level = 0
+                self.draw_pause()
+
+        if self.level > 0:
+            field = self.current_targets()
+            with profile('draw_level'):
+                self.draw_level(field, alpha)
+            with profile('draw_particles'):
+                self.particles.draw(self.renderer)
+            with profile('draw_gun'):
+                self.draw_gun()
+            with profile('draw_score'):
+                self.draw_score()
+        self.frame_profiler.draw(self.renderer)
+
+        if self.level > 0:
+            self.check_level_end()
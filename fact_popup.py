@@ -31,37 +31,67 @@ environmental_facts = [
 ]
 
 
-def show_fact_popup(screen, font):
-    fact = random.choice(environmental_facts)
+#the popup between levels. it no longer waits for a keypress itself - the main loop keeps running
+#(at its normal capped frame rate) and hands it the events until one of them closes it.
+#each fact's overlay is laid out and rendered the first time it is shown and kept, so showing a
+#fact again is a single blit
+class FactPopup:
+    def __init__(self, font, size, rng=random):
+        self.rng = rng
+        self.font = font
+        self.size = size
+        self.overlays = {}                                            #index in environmental_facts -> overlay surface
+        self.fact = None                                              #index of the fact being shown, None when closed
+        self.drawn = False
 
-    overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
+    def open(self, fact=None):
+        if fact is None:
+            fact = self.rng.randrange(len(environmental_facts))
+        self.fact = fact
+        self.drawn = False
+
+    def is_open(self):
+        return self.fact is not None
+
+    #returns True when the player has closed the popup
+    def handle(self, events):
+        for event in events:
+            if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+                self.fact = None
+                return True
+        return False
+
+    def overlay(self, fact):
+        overlay = self.overlays.get(fact)
+        if overlay is None:
+            overlay = build_overlay(environmental_facts[fact], self.font, self.size)
+            self.overlays[fact] = overlay
+        return overlay
+
+    #the overlay is see-through, so it only goes over the frozen game once
+    def draw(self, renderer):
+        if not self.drawn:
+            renderer.overlay(self.overlay(self.fact))
+            self.drawn = True
+
+
+def build_overlay(fact, font, size):
+    width, height = size
+    overlay = pygame.Surface(size, pygame.SRCALPHA)
     overlay.fill((0, 0, 0, 180))  # semi-transparent background
 
-    lines = split_text(fact, font, screen.get_width() - 100)
-    y_offset = (screen.get_height() - len(lines) * 30) // 2
+    lines = split_text(fact, font, width - 100)
+    y_offset = (height - len(lines) * 30) // 2
 
     for i, line in enumerate(lines):
         text = font.render(line, True, (255, 255, 255))
-        text_rect = text.get_rect(center=(screen.get_width() // 2, y_offset + i * 30))
+        text_rect = text.get_rect(center=(width // 2, y_offset + i * 30))
         overlay.blit(text, text_rect)
 
     continue_text = font.render("Press any key to continue...", True, (255, 255, 255))
-    continue_rect = continue_text.get_rect(center=(screen.get_width() // 2, screen.get_height() - 60))
+    continue_rect = continue_text.get_rect(center=(width // 2, height - 60))
     overlay.blit(continue_text, continue_rect)
-
-    screen.blit(overlay, (0, 0))
-    pygame.display.flip()
-
-    wait_for_keypress()
-
-def wait_for_keypress():
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            elif event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                return
+    return overlay.convert_alpha()
 
 def split_text(text, font, max_width):
     words = text.split(' ')
@@ -0,0 +1,76 @@
+# levels.py
+# the levels are described in levels.json instead of in the code - for every level its pictures,
+# laser colour, hit sound and target rows, and for every tier of targets how many there are, the
+# picture and the size it is drawn at, the speed in pixels per second and the points for a hit.
+# there is no hitbox to set - a shot has to land on a visible pixel of the picture (see targets.py).
+# the levels are played in the order they are listed, so adding a level is adding an entry to the
+# file. only the file itself is read at startup - a level's pictures and its spawn layout are made
+# in the background while the level before it is played
+import copy
+import json
+import numpy as np
+from targets import target_dtype, WIDTH
+
+LEVELS_PATH = 'levels.json'
+
+
+class Tier:
+    def __init__(self, spec):
+        self.count = spec['count']
+        self.image = spec['image']
+        self.size = tuple(spec['size'])
+        self.speed = float(spec['speed'])
+        self.points = spec['points']
+
+
+class Level:
+    def __init__(self, number, spec):
+        self.number = number
+        self.background = spec['background']
+        self.banner = spec['banner']
+        self.gun = spec['gun']
+        self.laser = spec['laser']
+        self.hit_sound = spec['hit_sound']
+        self.first_row = spec['first_row']                            #y of the slowest tier's row
+        self.row_gap = spec['row_gap']                                #each faster tier is this much higher up
+        self.stagger = spec['stagger']                                #every other target in a row sits this much lower
+        self.tiers = [Tier(tier) for tier in spec['tiers']]
+        self.layout = None
+
+    #where every target starts, grouped by tier and sorted by x the way TargetField wants it.
+    #made once, every time the level starts TargetField gets a copy
+    def spawn_layout(self):
+        if self.layout is None:
+            rows = np.zeros(sum(tier.count for tier in self.tiers), target_dtype)
+            start = 0
+            for i, tier in enumerate(self.tiers):
+                j = np.arange(tier.count)
+                tier_rows = rows[start:start + tier.count]
+                tier_rows['tier'] = i
+                tier_rows['x'] = WIDTH // tier.count * j
+                tier_rows['y'] = self.first_row - (i * self.row_gap) + self.stagger * (j % 2)
+                start += tier.count
+            rows['alive'] = True
+            rows['prev_x'] = rows['x']
+            self.layout = rows
+        return self.layout
+
+    #a copy with other target counts and speeds, for balance sweeps. speed_base makes tier i move
+    #speed_base ** i times as fast as the first tier
+    def tuned(self, counts=None, speed_base=None):
+        level = copy.copy(self)
+        level.tiers = [copy.copy(tier) for tier in self.tiers]
+        level.layout = None
+        for i, tier in enumerate(level.tiers):
+            if counts is not None:
+                tier.count = counts[i]
+            if speed_base is not None:
+                tier.speed = self.tiers[0].speed * speed_base ** i
+        return level
+
+
+#level number (from 1) -> Level
+def load_levels(path=LEVELS_PATH):
+    with open(path) as file:
+        specs = json.load(file)['levels']
+    return {number: Level(number, spec) for number, spec in enumerate(specs, 1)}
@@ -0,0 +1,52 @@
+# pacing.py
+# decides when the main loop runs its next frame. while a level is being played frames come at a
+# steady fps: the pacer sleeps for most of the frame and spins for the last couple of milliseconds,
+# because a plain sleep can wake up a few ms late and make the frame times uneven.
+# the menu, pause, game over and fact screens do not move, so the pacer blocks in pygame.event.wait
+# until the player does something instead of redrawing them 60 times a second - the kiosks sit
+# on the menu most of the day. it still wakes every idle_timeout seconds so the music and the
+# background loaders get picked up - timed_out tells the loop nothing happened, so it can skip the
+# frame - and the first frame of a new static screen is always drawn straight away
+import time
+import pygame
+
+SPIN = 0.001                                                          #seconds before the deadline to stop sleeping and start spinning
+
+
+class FramePacer:
+    def __init__(self, fps=60, idle_timeout=0.5):
+        self.fps = fps                                                #the frame rate cap while playing
+        self.idle_timeout = idle_timeout
+        self.was_idle = False
+        self.next_frame = time.perf_counter()
+        self.last_frame = self.next_frame
+        self.idle_frames = 0                                          #frames that waited for input, for the benchmark
+        self.timed_out = False                                        #the last idle wait ended with no events - the screen is still right
+
+    #waits until the next frame is due. returns (seconds since the last frame, the events that woke
+    #an idle wait up) - those events are already off the queue, so they have to go into the frame input
+    def wait(self, idle):
+        events = []
+        self.timed_out = False
+        if idle and self.was_idle:
+            event = pygame.event.wait(int(self.idle_timeout * 1000))
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+            else:
+                self.timed_out = True
+            self.idle_frames += 1
+            self.next_frame = time.perf_counter()
+        else:
+            self.next_frame += 1 / self.fps
+            remaining = self.next_frame - time.perf_counter()
+            if remaining > SPIN:
+                time.sleep(remaining - SPIN)
+            while time.perf_counter() < self.next_frame:
+                pass
+            if remaining < -1 / self.fps:                            #more than a frame behind - start counting again from now
+                self.next_frame = time.perf_counter()
+        self.was_idle = idle
+        now = time.perf_counter()
+        dt = now - self.last_frame
+        self.last_frame = now
+        return dt, events
@@ -0,0 +1,88 @@
+# particles.py
+# the bursts of sparks when a target is hit or a power-up is picked up. every particle is one slot in
+# a few numpy arrays made up front (position, velocity, age, lifetime, sprite), so moving all of them
+# is a handful of array operations a tick and drawing them is a single Surface.blits call - there is
+# no python object per particle.
+# new particles take the slots after the last ones handed out and wrap round at the cap, so once the
+# system is full it is always the oldest particles that get recycled
+import numpy as np
+import pygame
+from render import cover_rects
+
+GRAVITY = 500                                                         #pixels per second per second, downwards
+SIZES = (5, 4, 3, 2)                                                  #a particle shrinks through these over its life
+
+
+class ParticleSystem:
+    def __init__(self, capacity=20000, seed=None):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), np.float32)
+        self.vel = np.zeros((capacity, 2), np.float32)
+        self.step = np.zeros((capacity, 2), np.float32)               #scratch space so updating does not allocate
+        self.age = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.float32)
+        self.sprite = np.zeros(capacity, np.int32)                    #index of the particle's colour's biggest sprite
+        self.alive = np.zeros(capacity, np.bool_)
+        self.next = 0                                                 #the slot the next particle goes into
+        self.live = 0
+        self.rng = np.random.default_rng(seed)                       #its own rng, so effects never change the game's random choices
+        self.colors = {}                                              #colour -> its first sprite index
+        self.sprites = []                                             #len(SIZES) squares per colour, biggest first
+
+    def color_sprites(self, color):
+        index = self.colors.get(color)
+        if index is None:
+            index = self.colors[color] = len(self.sprites)
+            for size in SIZES:
+                sprite = pygame.Surface((size, size))
+                sprite.fill(color)
+                self.sprites.append(sprite)
+        return index
+
+    #count particles flying out of pos in every direction. speed and life are (lowest, highest) ranges
+    def burst(self, pos, count, color, speed=(80, 320), life=(.3, .8)):
+        count = min(count, self.capacity)
+        if count <= 0:
+            return
+        slots = (self.next + np.arange(count)) % self.capacity
+        self.next = (self.next + count) % self.capacity
+        angle = self.rng.uniform(0, 2 * np.pi, count)
+        speeds = self.rng.uniform(speed[0], speed[1], count)
+        self.pos[slots] = pos
+        self.vel[slots, 0] = np.cos(angle) * speeds
+        self.vel[slots, 1] = np.sin(angle) * speeds
+        self.age[slots] = 0
+        self.life[slots] = self.rng.uniform(life[0], life[1], count)
+        self.sprite[slots] = self.color_sprites(color)
+        self.alive[slots] = True
+        self.live = min(self.live + count, self.capacity)
+
+    #dt is in seconds
+    def update(self, dt):
+        if not self.live:
+            return
+        self.vel[:, 1] += GRAVITY * dt
+        np.multiply(self.vel, dt, out=self.step)
+        self.pos += self.step
+        self.age += dt
+        np.less(self.age, self.life, out=self.alive)
+        self.live = int(np.count_nonzero(self.alive))
+
+    def draw(self, screen):
+        if not self.live:
+            return
+        index = np.flatnonzero(self.alive)
+        stage = (self.age[index] * len(SIZES) / self.life[index]).astype(np.int32)
+        sprites = self.sprite[index] + np.minimum(stage, len(SIZES) - 1)
+        xs = self.pos[index, 0].astype(np.int32)
+        ys = self.pos[index, 1].astype(np.int32)
+        #the positions go in as columns zipped into tuples on the fly - a list of [x, y] lists is
+        #slower to build and keeps the garbage collector busy. every burst gets its own few rects,
+        #not one rect round all of them
+        screen.blits(zip(map(self.sprites.__getitem__, sprites.tolist()), zip(xs.tolist(), ys.tolist())),
+                     cover_rects(xs, ys, SIZES[0], SIZES[0]))
+
+    def clear(self):
+        self.alive[:] = False
+        self.life[:] = 0
+        self.live = 0
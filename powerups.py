@@ -1,64 +1,161 @@
 import pygame
-import random
-import time
-
-class ScoreMultiplierPowerUp:
-    def __init__(self, screen_width, screen_height):
-        self.image = pygame.transform.scale(
-            pygame.image.load('assets/powerups/score_multiplier.png'), (50, 50)
-        )
+
+# power-ups float across the sky and take effect when they are shot. every kind is a star picture
+# (tinted for the kinds that are not the score multiplier):
+#   duration  seconds the effect lasts once shot, 0 for the ones that act straight away
+#   interval  seconds of play between spawns of that kind
+#   modes     the game modes it shows up in
+POWERUP_KINDS = {
+    'multiplier': {'duration': 10, 'interval': 25, 'modes': (0, 1, 2, 3), 'tint': None},
+    'slow_time': {'duration': 6, 'interval': 40, 'modes': (0, 1, 2, 3), 'tint': (110, 170, 255)},
+    'ammo_refill': {'duration': 0, 'interval': 30, 'modes': (1,), 'tint': (120, 255, 140)},
+}
+SLOW_TIME_SCALE = 0.5                                                 #targets move at half speed while slow time is on
+AMMO_REFILL = 15                                                      #shots given back in accuracy mode
+SIZE = 50
+SPEEDS_X = (-120, 120)                                                #pixels per second
+SPEEDS_Y = (-60, 60)
+
+#what the HUD says for (multiplier on, slow time on)
+STATUS = {(True, False): '2X SCORE ACTIVE!', (False, True): 'SLOW TIME!', (True, True): '2X SCORE + SLOW TIME!'}
+
+
+def tinted(image, tint):
+    if tint is None:
+        return image
+    image = image.copy()
+    image.fill(tint, special_flags=pygame.BLEND_RGB_MULT)              #keeps the alpha, only darkens the colour channels
+    return image
+
+
+# one power-up in the sky or in effect. the pool makes all of them up front and spawning just
+# fills in a free one, so nothing is allocated while a level is played
+class PowerUp:
+    __slots__ = ('kind', 'image', 'x', 'y', 'vx', 'vy', 'rect', 'visible', 'active', 'ends_at')
+
+    def __init__(self):
+        self.kind = None
+        self.image = None
+        self.x = 0.0
+        self.y = 0.0
+        self.vx = 0
+        self.vy = 0
+        self.rect = pygame.Rect(0, 0, SIZE, SIZE)
+        self.visible = False                                          #floating in the sky, waiting to be shot
+        self.active = False                                           #shot, and its effect is running
+        self.ends_at = 0.0
+
+    def free(self):
+        return not self.visible and not self.active
+
+
+# all the power-ups of a game. the timers run on play time, which only moves on while a level is
+# being played (update is not called while the game is paused, in a menu or showing a fact), so a
+# multiplier no longer runs out while the game is paused
+class PowerUpManager:
+    def __init__(self, screen_width, screen_height, image, rng, pool_size=8):
         self.screen_width = screen_width
         self.screen_height = screen_height
-        self.x = random.randint(50, screen_width - 100)
-        self.y = random.randint(100, screen_height - 300)
-        self.rect = self.image.get_rect(topleft=(self.x, self.y))
-        
-        # Movement velocity
-        self.vx = random.choice([-2, 2])  # move left or right
-        self.vy = random.choice([-1, 1])  # move up or down
-        
-        self.active = False
-        self.start_time = 0
-        self.duration = 10  # seconds
-        self.visible = False
-        self.spawn_timer = 0
-
-    def spawn(self):
-        self.x = random.randint(50, self.screen_width - 100)
-        self.y = random.randint(100, self.screen_height - 300)
-        self.rect.topleft = (self.x, self.y)
-        self.vx = random.choice([-2, 2])
-        self.vy = random.choice([-1, 1])
-        self.visible = True
+        self.rng = rng
+        self.images = {kind: tinted(image, spec['tint']) for kind, spec in POWERUP_KINDS.items()}
+        self.mask = pygame.mask.from_surface(image)                  #tinting keeps the alpha, so every kind has the same shape
+        self.pool = [PowerUp() for _ in range(pool_size)]
+        self.live = dict.fromkeys(POWERUP_KINDS, 0)                  #kind -> how many are in the sky or in effect
+        self.last_spawn = dict.fromkeys(POWERUP_KINDS, 0)
+        self.time = 0.0                                               #seconds of play
+        self.multiplier = 1                                           #what a hit's points are multiplied by right now
+        self.time_scale = 1.0                                         #how fast the targets move right now
+
+    #a new game starts with nothing in the sky and nothing in effect
+    def reset(self):
+        for powerup in self.pool:
+            powerup.visible = False
+            powerup.active = False
+        for kind in self.live:
+            self.live[kind] = 0
+            self.last_spawn[kind] = 0
+        self.time = 0.0
+        self.multiplier = 1
+        self.time_scale = 1.0
+
+    def spawn(self, kind):
+        for powerup in self.pool:
+            if powerup.free():
+                rng = self.rng
+                powerup.kind = kind
+                powerup.image = self.images[kind]
+                powerup.x = rng.randint(50, self.screen_width - 100)
+                powerup.y = rng.randint(100, self.screen_height - 300)
+                powerup.rect.x = powerup.x
+                powerup.rect.y = powerup.y
+                powerup.vx = rng.choice(SPEEDS_X)
+                powerup.vy = rng.choice(SPEEDS_Y)
+                powerup.visible = True
+                self.live[kind] += 1
+                return powerup
+        return None                                                   #every slot is taken, skip this one
+
+    #a shot at pos - returns the kind that was hit, or None. like the targets, a shot has to land on
+    #one of the star's visible pixels, and the rect is checked first
+    def collide(self, pos):
+        for powerup in self.pool:
+            if (powerup.visible and powerup.rect.collidepoint(pos)
+                    and self.mask.get_at((pos[0] - powerup.rect.x, pos[1] - powerup.rect.y))):
+                powerup.visible = False
+                duration = POWERUP_KINDS[powerup.kind]['duration']
+                if duration:
+                    powerup.active = True
+                    powerup.ends_at = self.time + duration
+                else:
+                    self.live[powerup.kind] -= 1
+                self.refresh_effects()
+                return powerup.kind
+        return None
+
+    #one pass over the pool: effects running out, power-ups moving and bouncing, then new spawns.
+    #dt is the seconds since the last update
+    def update(self, dt, mode):
+        self.time += dt
+        expired = False
+        for powerup in self.pool:
+            if powerup.active and self.time > powerup.ends_at:
+                powerup.active = False
+                self.live[powerup.kind] -= 1
+                expired = True
+            elif powerup.visible:
+                powerup.x += powerup.vx * dt
+                powerup.y += powerup.vy * dt
+                # Bounce off walls
+                if powerup.x <= 0 or powerup.x + SIZE >= self.screen_width:
+                    powerup.vx = -powerup.vx
+                if powerup.y <= 0 or powerup.y + SIZE >= self.screen_height - 200:  # avoid bottom banner
+                    powerup.vy = -powerup.vy
+                powerup.rect.x = powerup.x
+                powerup.rect.y = powerup.y
+        if expired:
+            self.refresh_effects()
+
+        #each kind spawns once every `interval` seconds, and only when none of it is around
+        for kind, spec in POWERUP_KINDS.items():
+            if (self.time - self.last_spawn[kind] > spec['interval'] and not self.live[kind]
+                    and mode in spec['modes']):
+                self.spawn(kind)
+                self.last_spawn[kind] = self.time
+
+    def refresh_effects(self):
+        multiplier = slow = False
+        for powerup in self.pool:
+            if powerup.active:
+                multiplier = multiplier or powerup.kind == 'multiplier'
+                slow = slow or powerup.kind == 'slow_time'
+        self.multiplier = 2 if multiplier else 1
+        self.time_scale = SLOW_TIME_SCALE if slow else 1.0
+
+    #the HUD line for whatever is in effect, or None
+    def status(self):
+        return STATUS.get((self.multiplier > 1, self.time_scale < 1.0))
 
     def draw(self, screen):
-        if self.visible and not self.active:
-            screen.blit(self.image, self.rect)
-
-    def check_collision(self, mouse_pos):
-        if self.visible and self.rect.collidepoint(mouse_pos):
-            self.activate()
-
-    def activate(self):
-        self.active = True
-        self.start_time = time.time()
-        self.visible = False
-
-    def update(self):
-        # Handle active state duration
-        if self.active and time.time() - self.start_time > self.duration:
-            self.active = False
-
-        # Move the star if it's visible and not active
-        if self.visible and not self.active:
-            self.x += self.vx
-            self.y += self.vy
-
-            # Bounce off walls
-            if self.x <= 0 or self.x + 50 >= self.screen_width:
-                self.vx *= -1
-            if self.y <= 0 or self.y + 50 >= self.screen_height - 200:  # avoid bottom banner
-                self.vy *= -1
-
-            # Update rect position
-            self.rect.topleft = (self.x, self.y)
+        for powerup in self.pool:
+            if powerup.visible:
+                screen.blit(powerup.image, powerup.rect)
@@ -0,0 +1,147 @@
+# profiler.py
+# times each phase of a frame (background, draw_level, move_level, check_shot, draw_gun, draw_score,
+# events, present...). the rolling averages and percentiles can be shown on top of the game with F3,
+# and every recorded frame can be written out as CSV or as a Chrome trace (open it in chrome://tracing
+# or https://ui.perfetto.dev). when the profiler is off, phase() hands back one shared do-nothing
+# object so the instrumentation costs next to nothing
+import csv
+import json
+import time
+from collections import deque
+import pygame
+
+
+def percentile(sorted_times, p):
+    index = min(len(sorted_times) - 1, int(round(p / 100 * (len(sorted_times) - 1))))
+    return sorted_times[index]
+
+
+class NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_PHASE = NullPhase()
+
+
+class TimedPhase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, enabled=False, window=300, max_frames=36000):
+        self.enabled = enabled
+        self.recording = enabled                                      #every frame is only kept when profiling was asked for, not for F3
+        self.overlay_visible = False
+        self.window = window                                          #frames the rolling averages are taken over
+        self.history = {}                                             #phase -> last `window` per-frame totals in ms
+        self.frames = deque(maxlen=max_frames)                        #[(name, start, end), ...] for each recorded frame
+        self.events = None
+        self.epoch = time.perf_counter()
+        self.frame_start = 0.0
+        self.overlay = None
+        self.overlay_time = 0.0
+        self.font = None
+
+    def phase(self, name):
+        if self.events is None:
+            return NULL_PHASE
+        return TimedPhase(self, name)
+
+    def record(self, name, start, end):
+        self.events.append((name, start, end))
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+            self.events = []
+
+    def end_frame(self):
+        if self.events is None:
+            return
+        end = time.perf_counter()
+        self.events.append(('total', self.frame_start, end))
+        totals = {}
+        for name, start, stop in self.events:
+            totals[name] = totals.get(name, 0.0) + (stop - start) * 1000   #a phase can run more than once a frame
+        for name, ms in totals.items():
+            times = self.history.get(name)
+            if times is None:
+                times = self.history[name] = deque(maxlen=self.window)
+            times.append(ms)
+        if self.recording:
+            self.frames.append(self.events)
+        self.events = None
+
+    #F3 - showing the overlay turns the profiler on, and hiding it turns it off again unless
+    #profiling was asked for. the overlay only needs the rolling history
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.enabled = self.overlay_visible or self.recording
+
+    def summary(self):
+        rows = []
+        for name, times in self.history.items():
+            ordered = sorted(times)
+            rows.append((name, sum(ordered) / len(ordered), percentile(ordered, 95), percentile(ordered, 99)))
+        return rows
+
+    #the numbers are only re-rendered twice a second, so the overlay does not show up in its own profile
+    def draw(self, renderer):
+        if not self.overlay_visible:
+            return
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_time > 0.5:
+            self.overlay = self.render_overlay()
+            self.overlay_time = now
+        renderer.blit(self.overlay, (10, 10))
+
+    def render_overlay(self):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        lines = [f'{"phase":<14}{"avg":>8}{"p95":>8}{"p99":>8}  ms']
+        for name, avg, p95, p99 in self.summary():
+            lines.append(f'{name:<14}{avg:>8.2f}{p95:>8.2f}{p99:>8.2f}')
+        surfaces = [self.font.render(line, True, 'white') for line in lines]
+        width = max(surface.get_width() for surface in surfaces) + 10
+        overlay = pygame.Surface((width, 18 * len(surfaces) + 10), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        for i, surface in enumerate(surfaces):
+            overlay.blit(surface, (5, 5 + 18 * i))
+        return overlay
+
+    #one row per frame, one column per phase, in milliseconds
+    def export_csv(self, path):
+        names = list(self.history)
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame'] + names)
+            for index, events in enumerate(self.frames):
+                totals = dict.fromkeys(names, 0.0)
+                for name, start, end in events:
+                    totals[name] += (end - start) * 1000
+                writer.writerow([index] + [f'{totals[name]:.4f}' for name in names])
+
+    #Chrome trace event format - one complete ('X') event per phase, timestamps in microseconds
+    def export_trace(self, path):
+        trace = []
+        for events in self.frames:
+            for name, start, end in events:
+                trace.append({'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                              'ts': round((start - self.epoch) * 1e6, 1),
+                              'dur': round((end - start) * 1e6, 1)})
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, file)
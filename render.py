@@ -0,0 +1,282 @@
+# render.py
+# the engine draws through a renderer instead of straight onto the screen.
+# FullRenderer is the way the game always drew: clear, blit the whole background, draw everything, flip.
+# DirtyRenderer keeps the background of the current scene cached and only touches the parts of the
+# screen that something was drawn on - last frame's rects are painted back from the cached background,
+# this frame's sprites are drawn, and only those rects are pushed with pygame.display.update(rects)
+# TextureRenderer draws with SDL's 2D renderer instead of blitting in software: every picture is
+# uploaded to a texture the first time it is drawn and only drawn from the texture after that, and the
+# gun is rotated by the renderer as it is drawn instead of as a new surface. it needs the display made
+# with pygame.SCALED, which gives the window a renderer, and falls back to DirtyRenderer without one.
+# the frame is drawn into a target texture that is copied to the window on present, so like the
+# dirty renderer the last frame stays put while the fact popup is over it.
+# NullRenderer draws nothing at all - replays and batch runs only need the game state
+import math
+import weakref
+import numpy as np
+import pygame
+try:
+    from pygame._sdl2.video import Renderer, Texture, Window, error as SDLError
+except ImportError:                                                   #pygame built without the SDL2 renderer, only the software renderers work
+    Renderer = None
+
+CELL = 64                                                             #pixels square of the cells many pictures are covered by
+MAX_RECTS = 32                                                        #up to this many pictures each gets its own rect
+GRID = 128                                                            #cells per side looked at - anything further off the screen is not drawn anyway
+
+
+#rects that cover pictures of one size drawn at xs, ys (numpy int arrays), for the dirty renderer to
+#repaint and push. a few pictures get a rect each. many get one rect per run of CELL-sized cells in a
+#row of the screen that has any of them in it, so a tier or a burst costs a handful of rects and
+#only the sky it is actually in
+def cover_rects(xs, ys, width, height):
+    if len(xs) <= MAX_RECTS:
+        return [pygame.Rect(x, y, width, height) for x, y in zip(xs.tolist(), ys.tolist())]
+    #mark the cells that have a picture in a grid a cell bigger than the screen on every side - the
+    #marked cells come out sorted by row, then column
+    occupied = np.zeros(GRID * GRID, np.bool_)
+    occupied[np.clip(ys // CELL + 1, 0, GRID - 1) * GRID + np.clip(xs // CELL + 1, 0, GRID - 1)] = True
+    rows, columns = np.divmod(np.flatnonzero(occupied), GRID)
+    rows -= 1
+    columns -= 1
+    starts = np.flatnonzero(np.r_[True, (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1] + 1)])
+    ends = np.r_[starts[1:], len(rows)] - 1
+    return [pygame.Rect(left * CELL, row * CELL, (right - left + 1) * CELL + width, CELL + height)
+            for row, left, right in zip(rows[starts].tolist(), columns[starts].tolist(), columns[ends].tolist())]
+
+
+class FullRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+
+    #layers is a list of (surface, position) that make up the background of the scene
+    def begin(self, scene, layers):
+        self.screen.fill('black')
+        for surface, pos in layers(scene):
+            self.screen.blit(surface, pos)
+
+    def blit(self, surface, pos):
+        return self.screen.blit(surface, pos)
+
+    #many small pictures at once - sequence is (surface, position) pairs and rects cover all of them
+    #(see cover_rects)
+    def blits(self, sequence, rects):
+        self.screen.blits(sequence, doreturn=False)
+
+    #cache is the GunSpriteCache, which has the flipped and rotated picture ready
+    def blit_rotated(self, cache, index, flipped, angle, pos):
+        return self.blit(cache.get(index, flipped, angle), pos)
+
+    def circle(self, color, center, radius):
+        return pygame.draw.circle(self.screen, color, center, radius)
+
+    #a see-through picture over whatever is on the screen now (the fact popup)
+    def overlay(self, surface):
+        self.screen.blit(surface, (0, 0))
+
+    #the window lost what was on it (uncovered or restored) - flip pushes the whole screen anyway
+    def repaint(self):
+        pass
+
+    def present(self):
+        pygame.display.flip()
+
+
+class DirtyRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+        self.scene = None
+        self.background = None
+        self.backgrounds = {}                                         #scene -> background with all its layers flattened
+        self.drawn = []                                               #rects drawn on this frame
+        self.restored = []                                            #rects from last frame that were painted back
+        self.full_update = True
+
+    #a scene that is one opaque picture covering the whole screen (the menus) is its own background -
+    #a flattened copy would only double what it costs
+    def scene_background(self, scene, layers):
+        background = self.backgrounds.get(scene)
+        if background is None:
+            scene_layers = layers(scene)
+            if len(scene_layers) == 1:
+                surface, pos = scene_layers[0]
+                if (tuple(pos) == (0, 0) and surface.get_size() == self.screen.get_size()
+                        and not surface.get_flags() & pygame.SRCALPHA
+                        and surface.get_colorkey() is None and surface.get_alpha() is None):
+                    return surface                                    #not kept - it belongs to its asset page
+            background = pygame.Surface(self.screen.get_size()).convert()
+            background.fill('black')
+            for surface, pos in scene_layers:
+                background.blit(surface, pos)
+            self.backgrounds[scene] = background
+        return background
+
+    def begin(self, scene, layers):
+        if scene != self.scene:
+            #new scene - paint the whole background once and push the whole screen
+            self.scene = scene
+            self.background = self.scene_background(scene, layers)
+            self.screen.blit(self.background, (0, 0))
+            self.full_update = True
+            self.restored = []
+        else:
+            for rect in self.drawn:
+                self.screen.blit(self.background, rect, rect)
+            self.restored = self.drawn
+        self.drawn = []
+
+    def blit(self, surface, pos):
+        rect = self.screen.blit(surface, pos)
+        self.drawn.append(rect)
+        return rect
+
+    #the few rects that cover the batch are kept instead of thousands of tiny ones
+    def blits(self, sequence, rects):
+        self.screen.blits(sequence, doreturn=False)
+        screen_rect = self.screen.get_rect()
+        self.drawn.extend(screen_rect.clip(rect) for rect in rects)
+
+    def blit_rotated(self, cache, index, flipped, angle, pos):
+        return self.blit(cache.get(index, flipped, angle), pos)
+
+    def circle(self, color, center, radius):
+        rect = pygame.draw.circle(self.screen, color, center, radius)
+        self.drawn.append(rect)
+        return rect
+
+    #the overlay covers the whole screen, so push all of it once and then nothing until the next begin()
+    def overlay(self, surface):
+        self.screen.blit(surface, (0, 0))
+        self.full_update = True
+        self.restored = []
+        self.drawn = []
+        self.scene = None                                             #the screen no longer matches the cached background
+
+    #the window lost what was on it, but the screen surface still has the whole frame - push all of it
+    def repaint(self):
+        self.full_update = True
+
+    def present(self):
+        if self.full_update:
+            pygame.display.update()
+            self.full_update = False
+        else:
+            pygame.display.update(self.restored + self.drawn)
+
+
+class TextureRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+        self.renderer = Renderer.from_window(Window.from_display_module())
+        self.frame = Texture(self.renderer, screen.get_size(), target=True)
+        self.textures = weakref.WeakKeyDictionary()                  #surface -> its texture, gone when the surface is
+        self.circles = {}                                             #(color, radius) -> texture of a filled circle
+        self.uploads = 0
+
+    #pictures are never changed after they are made, so a texture made once stays right
+    def texture(self, surface):
+        texture = self.textures.get(surface)
+        if texture is None:
+            texture = self.textures[surface] = Texture.from_surface(self.renderer, surface)
+            self.uploads += 1
+        return texture
+
+    def begin(self, scene, layers):
+        self.renderer.target = self.frame
+        self.renderer.draw_color = (0, 0, 0, 255)
+        self.renderer.clear()
+        for surface, pos in layers(scene):
+            self.blit(surface, pos)
+
+    def blit(self, surface, pos):
+        rect = pygame.Rect(pos[0], pos[1], surface.get_width(), surface.get_height())
+        self.texture(surface).draw(dstrect=rect)
+        return rect
+
+    #a tier of targets is one picture many times, so its texture is only looked up when the picture changes
+    def blits(self, sequence, rects):
+        last = texture = None
+        for surface, pos in sequence:
+            if surface is not last:
+                last = surface
+                texture = self.texture(surface)
+            texture.draw(dstrect=pos)
+
+    #the unrotated picture is drawn turned by the renderer, at the exact angle, where the software
+    #renderers would put the picture pygame.transform.rotate makes - pos is the corner of its bounding box
+    def blit_rotated(self, cache, index, flipped, angle, pos):
+        gun = cache.load_gun(index)
+        width, height = gun.get_size()
+        radians = math.radians(angle)
+        cos, sin = abs(math.cos(radians)), abs(math.sin(radians))
+        box = pygame.Rect(pos[0], pos[1], width * cos + height * sin, width * sin + height * cos)
+        rect = pygame.Rect(0, 0, width, height)
+        rect.center = box.center
+        self.texture(gun).draw(dstrect=rect, angle=-angle, flip_x=flipped)   #SDL turns clockwise, pygame anticlockwise
+        return box
+
+    def circle(self, color, center, radius):
+        key = (color, radius)
+        texture = self.circles.get(key)
+        if texture is None:
+            surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (radius, radius), radius)
+            texture = self.circles[key] = Texture.from_surface(self.renderer, surface)
+        rect = pygame.Rect(center[0] - radius, center[1] - radius, radius * 2, radius * 2)
+        texture.draw(dstrect=rect)
+        return rect
+
+    def overlay(self, surface):
+        self.renderer.target = self.frame
+        self.texture(surface).draw()
+
+    #the whole frame texture is drawn to the window on every present
+    def repaint(self):
+        pass
+
+    def present(self):
+        self.renderer.target = None
+        self.frame.draw()
+        self.renderer.present()
+
+
+#the texture renderer when the display has a renderer to draw with, the dirty renderer when it does not
+def texture_renderer(screen):
+    if Renderer is not None:
+        try:
+            return TextureRenderer(screen)
+        except (pygame.error, SDLError):                              #a display made without pygame.SCALED has no renderer
+            print('the display has no renderer to draw textures with, drawing in software')
+    return DirtyRenderer(screen)
+
+
+class NullRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+
+    def begin(self, scene, layers):
+        pass
+
+    def blit(self, surface, pos):
+        return None
+
+    def blits(self, sequence, rects):
+        pass
+
+    def blit_rotated(self, cache, index, flipped, angle, pos):
+        return None
+
+    def circle(self, color, center, radius):
+        return None
+
+    def overlay(self, surface):
+        pass
+
+    def repaint(self):
+        pass
+
+    def present(self):
+        pass
+
+
+renderers = {'full': FullRenderer, 'dirty': DirtyRenderer, 'texture': texture_renderer, 'none': NullRenderer}
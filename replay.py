@@ -0,0 +1,172 @@
+# replay.py
+# records a session as the seed the game was started with plus what the player did on every frame
+# (how long the frame took, where the mouse was, which buttons were held and the clicks/keys/quit
+# events), and replays it headless as fast as the CPU goes. every random choice comes from the seeded
+# engine rng and every clock from the game ticks, so the same inputs always end on the same score.
+#
+#   python main.py --record session.lbr [--seed 1234]   (play as normal, the session is written on exit)
+#   python replay.py session.lbr                         (replays it and checks the final score matches)
+#   python replay.py session.lbr --render dirty          (also draw every frame, as a rendering workload)
+#
+# file layout, gzip compressed, little endian:
+#   header  'LBRP' magic, u16 version, u64 seed, u8 flags (1 = fact popups were on)
+#   frame   u32 dt in microseconds, i16 mouse x, i16 mouse y, u8 held buttons bitmask, u8 event count
+#   event   u8 kind, u32 button or key, i16 x, i16 y           (event count of these after each frame)
+#   end     u32 0xffffffff, i32 points, i32 total shots, i32 time passed
+#
+# a game that crashes writes no end, and one that is killed leaves the gzip stream cut off - the
+# recorder flushes every FLUSH_FRAMES frames, and a cut off recording replays up to its last whole frame
+import argparse
+import gzip
+import os
+import struct
+import sys
+import time
+import zlib
+import pygame
+from engine import GameEngine, FrameInput, WIDTH, HEIGHT
+
+MAGIC = b'LBRP'
+VERSION = 3                                                           #2: clicks resolved in the frame they were made, 3: pixel-accurate hits
+HEADER = struct.Struct('<4sHQB')
+FRAME = struct.Struct('<IhhBB')
+EVENT = struct.Struct('<BIhh')
+RESULT = struct.Struct('<iii')
+END = 0xffffffff
+FLAG_FACTS = 1
+FLUSH_FRAMES = 300                                                    #a killed game loses at most this many frames
+
+#event kinds - only the events the game reacts to are kept
+MOUSE_DOWN, MOUSE_UP, KEY_DOWN, QUIT = 1, 2, 3, 4
+
+
+def final_state(engine):
+    return engine.points, engine.total_shots, engine.time_passed
+
+
+class Recorder:
+    def __init__(self, path, seed, show_facts=True):
+        self.file = gzip.open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, FLAG_FACTS if show_facts else 0))
+        self.frames = 0
+
+    #writes one frame and hands back dt rounded to what was stored, so the live game steps with
+    #exactly the dt the replay will use
+    def frame(self, frame_input, dt):
+        dt_us = min(round(dt * 1e6), END - 1)
+        buttons = sum(1 << i for i, held in enumerate(frame_input.clicks[:3]) if held)
+        events = []
+        for event in frame_input.events:
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                events.append(EVENT.pack(MOUSE_DOWN, event.button, *event.pos))
+            elif event.type == pygame.MOUSEBUTTONUP:
+                events.append(EVENT.pack(MOUSE_UP, event.button, *event.pos))
+            elif event.type == pygame.KEYDOWN:
+                events.append(EVENT.pack(KEY_DOWN, event.key, 0, 0))
+            elif event.type == pygame.QUIT:
+                events.append(EVENT.pack(QUIT, 0, 0, 0))
+        events = events[:255]
+        x, y = frame_input.mouse_pos
+        self.file.write(FRAME.pack(dt_us, x, y, buttons, len(events)))
+        self.file.write(b''.join(events))
+        self.frames += 1
+        if self.frames % FLUSH_FRAMES == 0:
+            self.file.flush()
+        return dt_us / 1e6
+
+    #engine is None when the game crashed, then there is no final score to write
+    def close(self, engine):
+        if engine is not None:
+            self.file.write(struct.pack('<I', END) + RESULT.pack(*final_state(engine)))
+        self.file.close()
+
+
+def make_event(kind, code, x, y):
+    if kind == MOUSE_DOWN:
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=code, pos=(x, y))
+    if kind == MOUSE_UP:
+        return pygame.event.Event(pygame.MOUSEBUTTONUP, button=code, pos=(x, y))
+    if kind == KEY_DOWN:
+        return pygame.event.Event(pygame.KEYDOWN, key=code, mod=0, unicode='')
+    return pygame.event.Event(pygame.QUIT)
+
+
+#reads the whole file - a session is only a few bytes a frame, so even an hour of play fits easily.
+#the stream is decompressed by hand so a recording that was cut off still gives back what it has
+class Recording:
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            data = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(file.read())   #16 + MAX_WBITS: a gzip header
+        if len(data) < HEADER.size:
+            raise ValueError(f'{path} is too short to be a Litter Ballista recording')
+        magic, version, self.seed, flags = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} Litter Ballista recording')
+        self.show_facts = bool(flags & FLAG_FACTS)
+        self.frames = []                                              #[(dt, FrameInput), ...]
+        self.result = None                                            #(points, total shots, time passed), None if the game crashed
+        offset = HEADER.size
+        while offset + 4 <= len(data):
+            if struct.unpack_from('<I', data, offset)[0] == END:
+                if offset + 4 + RESULT.size <= len(data):
+                    self.result = RESULT.unpack_from(data, offset + 4)
+                break
+            if offset + FRAME.size > len(data):
+                break
+            dt_us, x, y, buttons, count = FRAME.unpack_from(data, offset)
+            if offset + FRAME.size + count * EVENT.size > len(data):
+                break                                                 #the last frame was only partly written
+            offset += FRAME.size
+            events = []
+            for _ in range(count):
+                events.append(make_event(*EVENT.unpack_from(data, offset)))
+                offset += EVENT.size
+            clicks = tuple(bool(buttons & (1 << i)) for i in range(3))
+            self.frames.append((dt_us / 1e6, FrameInput((x, y), clicks, events)))
+
+
+#steps a fresh engine through every recorded frame with no frame cap and no sound
+def replay(recording, screen, render_mode='none'):
+    engine = GameEngine(screen, scores_path=None, sound=False, show_facts=recording.show_facts,
+                        render_mode=render_mode, seed=recording.seed)
+    start = time.perf_counter()
+    for dt, frame_input in recording.frames:
+        engine.step(frame_input, dt)
+        engine.present()
+    seconds = time.perf_counter() - start
+    engine.scores.close()
+    return engine, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='replay a recorded Litter Ballista session headless')
+    parser.add_argument('path')
+    parser.add_argument('--render', default='none', choices=['none', 'full', 'dirty'])
+    args = parser.parse_args()
+
+    recording = Recording(args.path)
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')                #main.py imports the Recorder, so only go headless here
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.init()
+    screen = pygame.display.set_mode([WIDTH, HEIGHT])
+    engine, seconds = replay(recording, screen, args.render)                  #scores stay in memory, the real ones are never touched
+    pygame.quit()
+
+    frames = len(recording.frames)
+    played = sum(dt for dt, _ in recording.frames)
+    print(f'{frames} frames ({played:.1f} s of play) replayed in {seconds:.2f} s, '
+          f'{frames / max(seconds, 1e-9):.0f} frames/s')
+    state = final_state(engine)
+    print(f'points {state[0]}, shots {state[1]}, time {state[2]}')
+    if recording.result is None:
+        print('the recording has no final score to check against')
+    elif state != recording.result:
+        print(f'MISMATCH - the recording ended on points {recording.result[0]}, '
+              f'shots {recording.result[1]}, time {recording.result[2]}')
+        sys.exit(1)
+    else:
+        print('final score matches the recording')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# scores.py
+# every finished game goes into an SQLite database (scores.db) - the whole history of every mode,
+# not just the three best scores high_scores.txt used to hold. all database work runs on one
+# background thread, so saving a score on game over never holds up a frame, and every write is a
+# transaction, so a crash part way through a save leaves the last good scores in place.
+# the first time the game starts without a scores.db, the three old bests are copied over from
+# high_scores.txt (a missing or short file just counts as no score yet).
+#
+#   python scores.py                          (top 10 of every mode)
+#   python scores.py --mode timed --top 25
+import argparse
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+FREEPLAY, ACCURACY, TIMED, ENDLESS = 0, 1, 2, 3
+MODE_NAMES = {FREEPLAY: 'freeplay', ACCURACY: 'accuracy', TIMED: 'timed', ENDLESS: 'endless'}
+LEGACY_PATH = 'high_scores.txt'
+
+SCHEMA = '''
+create table if not exists scores (
+    id integer primary key,
+    mode integer not null,
+    score integer not null,           -- seconds to clear freeplay, points in the other modes
+    points integer,
+    shots integer,
+    hits integer,
+    time_passed integer,
+    played_at real,                   -- null for the bests copied over from high_scores.txt
+    epoch integer not null            -- the reset button starts a new epoch, bests only count the current one
+);
+create index if not exists scores_by_mode on scores (mode, epoch, score);
+create table if not exists meta (key text primary key, value integer not null);
+'''
+
+
+#freeplay is a race, lower is better. the other modes are a score, higher is better
+def better_first(mode):
+    return 'asc' if mode == FREEPLAY else 'desc'
+
+
+#the old three-line file - anything that is missing or not a number counts as no score
+def read_legacy(path):
+    try:
+        with open(path) as file:
+            lines = file.read().split()
+    except (OSError, ValueError):
+        return {}
+    bests = {}
+    for mode, line in zip((FREEPLAY, ACCURACY, TIMED), lines):
+        if line.isdigit() and int(line) > 0:
+            bests[mode] = int(line)
+    return bests
+
+
+class ScoreStore:
+    #path None keeps the scores in memory only - benchmarks, replays and batch runs use that so
+    #they start from the same bests as the game without ever writing to them
+    def __init__(self, path='scores.db', legacy_path=LEGACY_PATH):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.connection = None
+        self.epoch = 0
+        self.writer = ThreadPoolExecutor(max_workers=1)              #the connection lives on this thread only
+
+    #runs on the writer thread
+    def connect(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path or ':memory:')
+            if self.path is not None:
+                self.connection.execute('pragma journal_mode=wal')   #readers (python scores.py) never block the game
+                self.connection.execute('pragma synchronous=normal')
+            with self.connection:
+                self.connection.executescript(SCHEMA)
+                row = self.connection.execute("select value from meta where key = 'epoch'").fetchone()
+                self.epoch = row[0] if row else 0
+                if self.connection.execute("select 1 from meta where key = 'migrated'").fetchone() is None:
+                    self.migrate()
+        return self.connection
+
+    def migrate(self):
+        for mode, score in read_legacy(self.legacy_path).items():
+            self.connection.execute('insert into scores (mode, score, epoch) values (?, ?, ?)', (mode, score, self.epoch))
+        self.connection.execute("insert into meta (key, value) values ('migrated', 1)")   #same transaction as the copy
+
+    def run(self, job, *args):
+        return self.writer.submit(job, *args)
+
+    #the best score of each mode, as (freeplay, accuracy, timed, endless) with 0 for none yet. blocks - it is only
+    #asked for once, while the game is starting up
+    def bests(self):
+        return self.run(self.read_bests).result()
+
+    def read_bests(self):
+        connection = self.connect()
+        bests = []
+        for mode in MODE_NAMES:
+            row = connection.execute(f'select score from scores where mode = ? and epoch = ? '
+                                     f'order by score {better_first(mode)} limit 1', (mode, self.epoch)).fetchone()
+            bests.append(row[0] if row else 0)
+        return tuple(bests)
+
+    #saves a finished game in the background and returns straight away
+    def record(self, mode, score, points, shots, hits, time_passed):
+        return self.run(self.write_score, mode, score, points, shots, hits, time_passed, time.time())
+
+    def write_score(self, mode, score, points, shots, hits, time_passed, played_at):
+        connection = self.connect()
+        with connection:
+            connection.execute('insert into scores (mode, score, points, shots, hits, time_passed, played_at, epoch) '
+                               'values (?, ?, ?, ?, ?, ?, ?, ?)',
+                               (mode, score, points, shots, hits, time_passed, played_at, self.epoch))
+
+    #the reset button - the history is kept, the bests start again from nothing
+    def reset(self):
+        return self.run(self.write_reset)
+
+    def write_reset(self):
+        connection = self.connect()
+        with connection:
+            self.epoch += 1
+            connection.execute("insert or replace into meta (key, value) values ('epoch', ?)", (self.epoch,))
+
+    #the leaderboard of one mode, best first, through the (mode, epoch, score) index.
+    #returns a future - call .result() when the rows are needed
+    def top(self, mode, count=10, all_time=False):
+        return self.run(self.read_top, mode, count, all_time)
+
+    def read_top(self, mode, count, all_time):
+        connection = self.connect()
+        if all_time:
+            where, args = 'mode = ?', (mode, count)
+        else:
+            where, args = 'mode = ? and epoch = ?', (mode, self.epoch, count)
+        return connection.execute(f'select score, points, shots, hits, time_passed, played_at from scores '
+                                  f'where {where} order by score {better_first(mode)} limit ?', args).fetchall()
+
+    #waits for anything still being saved
+    def close(self):
+        self.run(self.close_connection)
+        self.writer.shutdown(wait=True)
+
+    def close_connection(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Litter Ballista leaderboards')
+    parser.add_argument('--db', default='scores.db')
+    parser.add_argument('--mode', choices=list(MODE_NAMES.values()))
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--all-time', action='store_true', help='include scores from before the last reset')
+    args = parser.parse_args()
+
+    store = ScoreStore(args.db)
+    modes = [mode for mode, name in MODE_NAMES.items() if args.mode in (None, name)]
+    for mode in modes:
+        print(f'{MODE_NAMES[mode]} ({"seconds, lowest" if mode == FREEPLAY else "points, highest"} first)')
+        for rank, (score, points, shots, hits, _, played_at) in enumerate(store.top(mode, args.top, args.all_time).result(), 1):
+            when = time.strftime('%Y-%m-%d %H:%M', time.localtime(played_at)) if played_at else 'high_scores.txt'
+            accuracy = f'{100 * hits / shots:.0f}% of {shots} shots' if shots else ''
+            print(f'  {rank:>3}. {score:>6}  {when:<18}{accuracy}')
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# sprite_cache.py
+# rotating the gun every frame is one of the most expensive things a frame does, so the flipped and
+# rotated gun pictures are made once and remembered. angles are rounded to `step` degrees so the same
+# few hundred pictures get reused, and only `max_entries` are kept - the least recently used one is
+# thrown away when the cache is full
+from collections import OrderedDict
+import pygame
+
+
+class GunSpriteCache:
+    def __init__(self, load_gun, step=2, max_entries=256):
+        self.load_gun = load_gun                                      #level index -> the gun picture for that level
+        self.step = step
+        self.max_entries = max_entries
+        self.sprites = OrderedDict()                                  #(level index, flipped, angle) -> rotated surface
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, gun_index, flipped, angle):
+        angle = round(angle / self.step) * self.step % 360
+        key = (gun_index, flipped, angle)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
+        self.misses += 1
+        gun = self.load_gun(gun_index)
+        if flipped:
+            gun = pygame.transform.flip(gun, True, False)
+        sprite = pygame.transform.rotate(gun, angle)
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.max_entries:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    #the level's gun picture is gone, so are the pictures made from it
+    def forget(self, gun_index):
+        for key in [key for key in self.sprites if key[0] == gun_index]:
+            del self.sprites[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.sprites)}
@@ -0,0 +1,45 @@
+# startup.py
+# times each phase of startup so we can keep time-to-first-frame under a budget.
+#
+#   python main.py --profile-startup                         (prints the phases after the first frame)
+#   python main.py --profile-startup --startup-budget 400    (and warns if the first frame took over 400 ms)
+import time
+
+
+class StartupProfiler:
+    def __init__(self, enabled=False, budget_ms=None):
+        self.enabled = enabled
+        self.budget_ms = budget_ms
+        self.start = time.perf_counter()
+        self.phases = []                                              #(name, milliseconds) in the order they ran
+        self.reported = False
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def first_frame(self):
+        if self.enabled and not self.reported:
+            self.reported = True
+            self.report((time.perf_counter() - self.start) * 1000)
+
+    def report(self, total_ms):
+        print('startup phases:')
+        for name, ms in self.phases:
+            print(f'  {name:<24}{ms:>9.1f} ms')
+        print(f'  {"time to first frame":<24}{total_ms:>9.1f} ms')
+        if self.budget_ms is not None and total_ms > self.budget_ms:
+            print(f'  over the {self.budget_ms:.0f} ms startup budget by {total_ms - self.budget_ms:.1f} ms')
+
+
+class Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.phases.append((self.name, (time.perf_counter() - self.start) * 1000))
+        return False
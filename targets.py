@@ -0,0 +1,141 @@
+# targets.py
+# all the targets of a level live in one numpy array, one row per target (tier, x, y, alive),
+# so moving and wrapping are done for every target at once instead of
+# rebuilding tuples and rects in nested python loops.
+# the rows are kept grouped by tier and sorted by x inside each tier. every target in a tier moves
+# at the same speed so that order never changes, except when targets wrap round - and those are
+# always the leftmost ones, so the tier's rows just rotate. that makes each tier an x-sorted bucket
+# that a shot can binary search instead of scanning every target.
+# the speeds and starting layout of each level come from levels.json (see levels.py).
+# a shot only hits a target if it lands on a visible pixel of its picture: each tier's picture has a
+# pygame mask made once when the level is loaded, the binary search and the mask's bounding rect pick
+# out the few targets that could be under the shot, and only those look the pixel up in the mask
+from itertools import repeat
+import numpy as np
+import pygame
+from render import cover_rects
+
+WIDTH = 900
+
+#one row per target. prev_x is where it was one tick ago, for drawing in between ticks, and draw_x is
+#where it was drawn on the last frame - that is where the player saw it, so that is what shots are
+#tested against. it is a column of the rows so it stays with its target when a tier's rows rotate
+target_dtype = np.dtype([('tier', np.int16), ('x', np.float32), ('y', np.float32), ('alive', np.bool_),
+                         ('prev_x', np.float32), ('draw_x', np.float32)])
+
+
+class TargetField:
+    #speeds[i] is how fast tier i moves in pixels per second, masks[i] the mask of its picture as drawn
+    def __init__(self, rows, speeds, masks):
+        self.rows = rows
+        self.tier = rows['tier']
+        self.x = rows['x']
+        self.y = rows['y']
+        self.alive = rows['alive']
+        self.prev_x = rows['prev_x']
+        self.speed = np.asarray(speeds, np.float64)[self.tier] if len(rows) else np.zeros(0)
+        self.step_size = np.zeros(len(rows))                              #scratch space so moving does not allocate
+        self.draw_x = rows['draw_x']
+        self.draw_x[:] = self.x                                           #until the first frame is drawn, where they start
+        self.wrapped = np.zeros(len(rows), np.bool_)                      #scratch space so moving does not allocate
+        #(start, end) of each tier's rows
+        tiers = int(self.tier.max()) + 1 if len(rows) else 0
+        bounds = np.searchsorted(self.tier, np.arange(tiers + 1))
+        self.tier_slices = [(int(bounds[i]), int(bounds[i + 1])) for i in range(tiers)]
+        self.wrap_counts = [0] * tiers                                    #per tier, how many targets wrapped on the last move
+        self.masks = list(masks)
+        #(x, y, width, height) from the top left of the picture round everything the mask covers
+        self.hitboxes = [tuple(bounding_rect(mask)) for mask in self.masks]
+
+    #a level as it starts, from its precomputed spawn layout
+    @classmethod
+    def from_level(cls, level, masks):
+        return cls(level.spawn_layout().copy(), [tier.speed for tier in level.tiers], masks)
+
+    #stress and event builds: thousands of targets scattered through the tier rows of a level
+    @classmethod
+    def swarm(cls, total, level, masks, row_gap=100, seed=0):
+        tiers = len(level.tiers)
+        rng = np.random.default_rng(seed)
+        rows = np.zeros(total, target_dtype)
+        rows['tier'] = rng.integers(0, tiers, total)
+        rows['x'] = rng.integers(-150, WIDTH, total)
+        rows['y'] = 300 - rows['tier'] * row_gap + rng.integers(0, 60, total)
+        rows['alive'] = True
+        rows['prev_x'] = rows['x']
+        return cls(rows[np.lexsort((rows['x'], rows['tier']))],           #grouped by tier, sorted by x
+                   [tier.speed for tier in level.tiers], masks)
+
+    #dt is in seconds
+    def move(self, dt):
+        x = self.x
+        self.prev_x[:] = x
+        np.less(x, -150, out=self.wrapped)
+        np.multiply(self.speed, dt, out=self.step_size)
+        np.subtract(x, self.step_size, out=x, casting='unsafe')
+        x[self.wrapped] = WIDTH                                           #anything that went off the left comes back in on the right
+        self.prev_x[self.wrapped] = WIDTH                                 #without sliding back across the screen
+        for tier, (start, end) in enumerate(self.tier_slices):
+            count = int(np.count_nonzero(self.wrapped[start:end]))
+            self.wrap_counts[tier] = count
+            if count:
+                #the wrapped targets were the leftmost of their tier and are now the rightmost
+                self.rows[start:end] = np.roll(self.rows[start:end], -count)
+
+    #alpha is how far we are between the last tick and the next one. every tier is one blits call -
+    #the whole tier has the same picture, so the sequence is that picture repeated next to the live
+    #targets' positions, and the renderer is told the rects of sky the tier covers
+    def draw(self, screen, images, alpha=1.0):
+        draw_x = self.draw_x
+        np.subtract(self.x, self.prev_x, out=draw_x)
+        draw_x *= alpha
+        draw_x += self.prev_x
+        for tier, (start, end) in enumerate(self.tier_slices):
+            alive = self.alive[start:end]
+            xs = draw_x[start:end][alive].astype(np.int32)
+            if not len(xs):
+                continue
+            ys = self.y[start:end][alive].astype(np.int32)
+            image = images[tier]
+            screen.blits(zip(repeat(image), zip(xs.tolist(), ys.tolist())), cover_rects(xs, ys, *image.get_size()))
+
+    #the row of the topmost live target under pos, or -1. targets are drawn in row order so the
+    #topmost one is the hit with the highest row - only the targets of each tier drawn
+    #close enough to pos are looked at
+    def hit_test(self, pos):
+        for tier in range(len(self.tier_slices) - 1, -1, -1):
+            start, end = self.tier_slices[tier]
+            box_x, box_y, width, height = self.hitboxes[tier]
+            mask = self.masks[tier]
+            xs = self.draw_x[start:end]                                   #still sorted - nothing has moved since the frame was drawn
+            #the box starts box_x pixels in, so draw_x has to be in (pos[0] - box_x - width, pos[0] - box_x].
+            #one pixel more on each side, because the picture is drawn at x rounded towards zero
+            low = int(np.searchsorted(xs, pos[0] - box_x - width - 1, 'right'))
+            high = int(np.searchsorted(xs, pos[0] - box_x + 1, 'right'))
+            for row in range(start + high - 1, start + low - 1, -1):
+                #the pixel of the picture under the shot, where the picture was drawn. the rows of a
+                #tier are spread over a few heights, so y rules most of them out before anything else
+                y = pos[1] - int(self.y[row])
+                if not box_y <= y < box_y + height or not self.alive[row]:
+                    continue
+                x = pos[0] - int(self.draw_x[row])
+                if box_x <= x < box_x + width and mask.get_at((x, y)):
+                    return row
+        return -1
+
+    def kill(self, index):
+        self.alive[index] = False
+
+    def cleared(self):
+        return not self.alive.any()
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive))
+
+
+#the smallest rect round every set pixel of a mask
+def bounding_rect(mask):
+    rects = mask.get_bounding_rects()
+    if not rects:
+        return pygame.Rect(0, 0, 0, 0)
+    return rects[0].unionall(rects[1:])
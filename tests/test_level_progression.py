@@ -0,0 +1,44 @@
+# plays a freeplay game headless from level 1 to the end, clearing each level by hand, and checks
+# that every level is actually played and that the game only ends after the last one
+import os
+import sys
+
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+import pytest
+from engine import GameEngine, FrameInput, WIDTH, HEIGHT
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.chdir(ROOT)                                           #the pictures and fonts are found from the repo root
+    pygame.init()
+    screen = pygame.display.set_mode([WIDTH, HEIGHT])
+    engine = GameEngine(screen, scores_path=None, sound=False, show_facts=False)   #scores kept in memory
+    yield engine
+    engine.scores.close()
+    pygame.quit()
+
+
+def play(engine, frames=5):
+    for _ in range(frames):
+        engine.step(FrameInput())
+
+
+def test_every_level_is_played_before_game_over(engine):
+    engine.start_game(0)
+    play(engine)
+    last = 3                                                          #the game has three levels
+    for level in range(1, last + 1):
+        assert engine.level == level and not engine.game_over
+        engine.level_targets[level].alive[:] = False                  #shoot everything on the level
+        play(engine, 1)
+        if level < last:
+            play(engine)
+            assert engine.level == level + 1, f'level {level} was cleared but level {level + 1} did not start'
+            assert not engine.game_over, f'the game ended on the first frames of level {level + 1}'
+    assert engine.game_over
@@ -0,0 +1,74 @@
+# text_cache.py
+# font.render is slow, and the HUD and menus were calling it several times a frame for text that
+# had not changed. TextCache remembers rendered text by (font, string, colour) and throws away the
+# least recently used surface when it gets full. NumberText builds "label + number" text out of
+# cached single-character glyphs, so a score going up never has to rasterize the font again.
+# HudField keeps the surface of one line of the HUD and only rebuilds it when its value changes
+from collections import OrderedDict
+import pygame
+
+
+class TextCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()                                 #(font, text, colour) -> surface
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, colour):
+        key = (font, text, colour)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, colour)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+class NumberText:
+    def __init__(self, text_cache, font, colour):
+        self.text_cache = text_cache
+        self.font = font
+        self.colour = colour
+        self.glyphs = {}                                              #single characters of the numbers, never evicted
+
+    def glyph(self, char):
+        surface = self.glyphs.get(char)
+        if surface is None:
+            surface = self.font.render(char, True, self.colour)
+            self.glyphs[char] = surface
+        return surface
+
+    #the label comes from the text cache, the number is stuck together from glyphs
+    def render(self, label, number):
+        label_surface = self.text_cache.render(self.font, label, self.colour)
+        glyphs = [self.glyph(char) for char in str(number)]
+        width = label_surface.get_width() + sum(glyph.get_width() for glyph in glyphs)
+        height = max([label_surface.get_height()] + [glyph.get_height() for glyph in glyphs])
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.blit(label_surface, (0, 0))
+        x = label_surface.get_width()
+        for glyph in glyphs:
+            surface.blit(glyph, (x, 0))
+            x += glyph.get_width()
+        return surface
+
+
+#one line of the HUD. render(value) makes the surface for a value and is only called when it changes
+class HudField:
+    def __init__(self, pos, render):
+        self.pos = pos
+        self.render = render
+        self.value = None
+        self.surface = None
+
+    def draw(self, screen, value):
+        if self.surface is None or value != self.value:
+            self.value = value
+            self.surface = self.render(value)
+        screen.blit(self.surface, self.pos)
@@ -0,0 +1,76 @@
+# waves.py
+# endless mode. the targets come from a fixed pool made when the game starts - POOL_FACTOR times each
+# tier's count in levels.json, spread evenly along the tier's row - and no target is ever made or
+# thrown away after that. a target that is shot stays in its slot, dead, and a target that gets off
+# the left of the screen alive has escaped. either way its slot comes back in on the right like every
+# target does, and the current wave decides whether the slot comes back with a target in it.
+# the waves come from a generator that never runs out: every wave fills more of the slots and moves
+# the targets a little faster, until every slot is filled at twice the speed. the game is over when
+# too many targets have escaped
+import numpy as np
+from targets import TargetField, target_dtype, WIDTH
+
+POOL_FACTOR = 2                                                       #slots per target a tier has in levels.json
+WAVE_SECONDS = 20
+
+
+class Wave:
+    def __init__(self, number, fill, speed_scale):
+        self.number = number
+        self.fill = fill                                              #per tier, the chance a slot comes back with a target in it
+        self.speed_scale = speed_scale                                #how much faster than levels.json the targets move
+
+
+#wave 1 fills 15% of the slowest tier's slots, and faster tiers fill a little less
+def waves(tiers):
+    number = 1
+    while True:
+        fill = [min(1.0, (.15 + .04 * (number - 1)) * (1 - .15 * tier)) for tier in range(tiers)]
+        yield Wave(number, fill, min(2.0, 1 + .04 * (number - 1)))
+        number += 1
+
+
+class EndlessField(TargetField):
+    def __init__(self, level, masks, seed):
+        counts = [tier.count * POOL_FACTOR for tier in level.tiers]
+        rows = np.zeros(sum(counts), target_dtype)
+        start = 0
+        for i, count in enumerate(counts):
+            j = np.arange(count)
+            tier_rows = rows[start:start + count]
+            tier_rows['tier'] = i
+            tier_rows['x'] = -150 + (WIDTH + 150) * j / count         #evenly spaced over the whole loop, so wrapping keeps the gaps
+            tier_rows['y'] = level.first_row - (i * level.row_gap) + level.stagger * (j % 2)
+            start += count
+        rows['prev_x'] = rows['x']
+        super().__init__(rows, [tier.speed for tier in level.tiers], masks)
+        self.base_speed = self.speed.copy()
+        self.rng = np.random.default_rng(seed)
+        self.waves = waves(len(level.tiers))
+        self.wave = None
+        self.wave_time = 0.0
+        self.escaped = 0
+        self.start_wave()
+        for tier, (start, end) in enumerate(self.tier_slices):
+            self.alive[start:end] = self.rng.random(end - start) < self.wave.fill[tier]
+
+    def start_wave(self):
+        self.wave = next(self.waves)
+        np.multiply(self.base_speed, self.wave.speed_scale, out=self.speed)
+
+    def move(self, dt):
+        self.wave_time += dt
+        if self.wave_time >= WAVE_SECONDS:
+            self.wave_time -= WAVE_SECONDS
+            self.start_wave()
+        super().move(dt)
+        #the slots that just came back in on the right are the last ones of their tier
+        for tier, (start, end) in enumerate(self.tier_slices):
+            count = self.wrap_counts[tier]
+            if count:
+                self.escaped += int(np.count_nonzero(self.alive[end - count:end]))
+                self.alive[end - count:end] = self.rng.random(count) < self.wave.fill[tier]
+
+    #there is always another wave
+    def cleared(self):
+        return False